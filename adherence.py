@@ -0,0 +1,153 @@
+import json
+from datetime import datetime, timedelta
+
+# A dose taken up to this long after it was due still counts as on time
+ON_TIME_WINDOW = timedelta(minutes=30)
+
+# Scope of the summary row that covers every reminder of the user
+USER_SCOPE = '*'
+
+# Columns of a stored summary row, in table order
+ADHERENCE_COLUMNS = (
+    'scope',
+    'taken',
+    'on_time',
+    'skipped',
+    'missed',
+    'delay_seconds',
+    'current_streak',
+    'longest_streak',
+    'missed_by_hour',
+    'last_event'
+)
+
+def _parse_time(value):
+    try:
+        return datetime.fromisoformat(value) if value else None
+    except (TypeError, ValueError):
+        return None
+
+class AdherenceStats:
+    """
+    Streaming adherence aggregates of one reminder, or of all the user's
+    reminders when scope is USER_SCOPE.
+
+    Only counters are kept, so folding in a dose event with add() is O(1)
+    and the whole summary is one small row (see ReminderStore): dashboards
+    read it instead of rescanning the dose history.
+
+    A taken dose is late when it was taken more than ON_TIME_WINDOW after
+    the time it was due (the reminder's next_time before the event); doses
+    taken without a schedule (the first of a course) count as on time.
+    The streak is the number of doses taken in a row since the last
+    skipped or missed one. Snoozing leaves the dose open and counts for
+    nothing.
+    """
+    __slots__ = ADHERENCE_COLUMNS
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.taken = self.on_time = self.skipped = self.missed = 0
+        self.delay_seconds = 0
+        self.current_streak = self.longest_streak = 0
+        self.missed_by_hour = [0] * 24
+        self.last_event = None
+
+    @classmethod
+    def from_row(cls, row):
+        stats = cls(row['scope'])
+        for column in ADHERENCE_COLUMNS[1:]:
+            setattr(stats, column, row[column])
+        stats.missed_by_hour = json.loads(row['missed_by_hour'])
+        return stats
+
+    def to_row(self):
+        """Values in ADHERENCE_COLUMNS order"""
+        return tuple(
+            json.dumps(self.missed_by_hour) if column == 'missed_by_hour' else getattr(self, column)
+            for column in ADHERENCE_COLUMNS
+        )
+
+    def add(self, event, scheduled=None):
+        """Fold in one dose event; scheduled is the ISO time the dose was due, if known"""
+        kind = event['event']
+        if kind == 'taken':
+            due, taken = _parse_time(scheduled), _parse_time(event['time'])
+            delay = max(int((taken - due).total_seconds()), 0) if due and taken else 0
+            self.taken += 1
+            self.delay_seconds += delay
+            if delay <= ON_TIME_WINDOW.total_seconds():
+                self.on_time += 1
+            self.current_streak += 1
+            self.longest_streak = max(self.longest_streak, self.current_streak)
+        elif kind in ('skipped', 'missed'):
+            if kind == 'missed':
+                self.missed += 1
+                # A missed event's time is when the dose was due
+                due = _parse_time(event['time'])
+                if due is not None:
+                    self.missed_by_hour[due.hour] += 1
+            else:
+                self.skipped += 1
+            self.current_streak = 0
+        else:
+            return
+        self.last_event = event['time']
+
+    @property
+    def due(self):
+        """Doses that came due: taken, skipped or missed"""
+        return self.taken + self.skipped + self.missed
+
+    @property
+    def on_time_rate(self):
+        """Share of due doses taken on time, or None before any came due"""
+        return self.on_time / self.due if self.due else None
+
+    @property
+    def mean_delay_minutes(self):
+        """Average lateness of the doses taken, or None before any was taken"""
+        return self.delay_seconds / self.taken / 60 if self.taken else None
+
+    def to_dict(self):
+        """The counters plus the derived rates, for dashboards"""
+        summary = {column: getattr(self, column) for column in ADHERENCE_COLUMNS}
+        summary['missed_by_hour'] = list(self.missed_by_hour)
+        summary.update(due=self.due, on_time_rate=self.on_time_rate,
+                       mean_delay_minutes=self.mean_delay_minutes)
+        return summary
+
+    def __repr__(self):
+        return f"AdherenceStats({self.scope!r}, due={self.due}, on_time={self.on_time})"
+
+class AdherenceUpdate:
+    """
+    The summary rows touched while folding a run of dose events, loaded on
+    first use. One update covers one transaction; save() writes back only
+    the rows that changed.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.stats = {}
+
+    def _get(self, scope):
+        stats = self.stats.get(scope)
+        if stats is None:
+            row = self.conn.execute('SELECT * FROM adherence WHERE scope = ?', (scope,)).fetchone()
+            stats = self.stats[scope] = AdherenceStats.from_row(row) if row else AdherenceStats(scope)
+        return stats
+
+    def add(self, event, scheduled=None):
+        """Fold one event into its reminder's row and the user's row"""
+        self._get(event['reminder_id']).add(event, scheduled)
+        self._get(USER_SCOPE).add(event, scheduled)
+
+    def save(self):
+        if not self.stats:
+            return
+        self.conn.executemany(
+            f"INSERT OR REPLACE INTO adherence ({', '.join(ADHERENCE_COLUMNS)}) "
+            f"VALUES ({', '.join('?' * len(ADHERENCE_COLUMNS))})",
+            [stats.to_row() for stats in self.stats.values()]
+        )
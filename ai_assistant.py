@@ -5,6 +5,17 @@ import threading
 import time
 import random
 import json
+import re
+from datetime import datetime
+from frequency import parse_frequency
+from medication_reminder import MedicationReminder
+from reminder_record import total_doses
+
+# Frequency phrases in free text, longest forms first so "twice daily" wins over "daily"
+FREQUENCY_PHRASE = re.compile(
+    r'\b(?:(?:once|twice|thrice|one|two|three|four|five|six|\d+)\s*(?:x|times?)?\s*(?:daily|a day|per day)'
+    r'|every\s+(?:\w+\s+)?hours?|q\s*\d+\s*h|bid|tid|qid|qd|every day|each day|daily)\b'
+)
 
 class AIAssistant(EventDispatcher):
     """A simplified AI assistant that doesn't require external dependencies"""
@@ -79,9 +90,17 @@ class AIAssistant(EventDispatcher):
     
     def _generate_response(self, user_input):
         """Generate a response based on keywords in the user input"""
+        # Check if the user is asking which doses are coming up
+        if self._check_for_schedule_query(user_input):
+            return self._handle_schedule_query(user_input)
+        
         # Check if this is a request to create a reminder
         if self._check_for_reminder_request(user_input):
             return self._handle_reminder_request(user_input)
+        
+        # Check if the user is asking how well they keep to their schedule
+        if self._check_for_adherence_query(user_input):
+            return self._handle_adherence_query()
             
         # Handle health and wellness queries
         if any(word in user_input for word in ['hello', 'hi', 'hey', 'greetings']):
@@ -102,6 +121,76 @@ class AIAssistant(EventDispatcher):
         # Return a random response from the selected category
         return random.choice(self.responses[category])
         
+    def _check_for_schedule_query(self, user_input):
+        """Check if the user is asking about upcoming doses"""
+        schedule_phrases = [
+            'next dose', 'next medication', 'next pill', 'upcoming dose',
+            "what's due", 'what is due', 'due today', 'when is my next'
+        ]
+        return any(phrase in user_input for phrase in schedule_phrases)
+    
+    def _handle_schedule_query(self, user_input):
+        """Answer from the reminders' next-due index, or the dose timeline for today"""
+        manager = MedicationReminder()
+        now = datetime.now()
+        if 'today' in user_input:
+            # Every dose left today, not just each reminder's next one
+            doses = manager.get_doses_due_today()
+            if not doses:
+                return "You have no more doses scheduled for today."
+        else:
+            # Doses already due and not taken come first, then the next ones
+            overdue = [
+                r for r in manager.get_due_between(None, now)
+                if r['is_active'] and r['doses_taken'] + (r.get('doses_missed') or 0) < total_doses(r)
+            ]
+            upcoming = manager.get_next_due(3, now)
+            if not overdue and not upcoming:
+                return "You have no upcoming doses scheduled. Take a dose from the Reminders section to start its schedule."
+            parts = []
+            if overdue:
+                late = self._format_doses([(r, r['next_time']) for r in overdue], now, 'was due at')
+                parts.append("Overdue: " + "; ".join(late) + ".")
+            if upcoming:
+                label = "Then" if overdue else "Your next doses"
+                parts.append(f"{label}: " + "; ".join(self._format_doses([(r, r['next_time']) for r in upcoming], now)) + ".")
+            return " ".join(parts)
+        return "Your next doses: " + "; ".join(self._format_doses(doses, now)) + "."
+    
+    def _format_doses(self, doses, now, when='at'):
+        """'Name dosage at HH:MM[ on Mon DD]' for each (reminder, dose time)"""
+        return [
+            f"{r['medication_name']} {r['dosage']} {when} {time.strftime('%H:%M')}"
+            + ("" if time.date() == now.date() else f" on {time.strftime('%b %d')}")
+            for r, time in doses
+        ]
+    
+    def _check_for_adherence_query(self, user_input):
+        """Check if the user is asking about their adherence"""
+        adherence_phrases = [
+            'adherence', 'how am i doing', 'missed doses', 'my streak',
+            'how many doses did i miss'
+        ]
+        return any(phrase in user_input for phrase in adherence_phrases)
+    
+    def _handle_adherence_query(self):
+        """Answer from the precomputed adherence summary"""
+        summary = MedicationReminder().get_adherence()
+        if not summary['due']:
+            return "No doses have come due yet, so there is nothing to report."
+        parts = [
+            f"You took {summary['on_time_rate']:.0%} of your {summary['due']} doses on time",
+            f"missed {summary['missed']} and skipped {summary['skipped']}"
+        ]
+        if summary['taken']:
+            parts.append(f"doses were {summary['mean_delay_minutes']:.0f} minutes late on average")
+        response = "; ".join(parts) + "."
+        response += f" Current streak: {summary['current_streak']} doses (best {summary['longest_streak']})."
+        if summary['missed']:
+            hour = max(range(24), key=lambda h: summary['missed_by_hour'][h])
+            response += f" Most missed doses were due around {hour:02d}:00."
+        return response
+    
     def _check_for_reminder_request(self, user_input):
         """Check if the user is requesting to create a reminder"""
         # Pattern 1: Direct request to create/set/add a reminder
@@ -148,7 +237,7 @@ class AIAssistant(EventDispatcher):
         # Convert to JSON string to pass through the property
         try:
             # Generate a direct reminder creation message
-            reminder_message = f"Creating reminder for {medication_info['medication']} {medication_info['dosage']} to be taken {medication_info['frequency']}"
+            reminder_message = f"Creating reminder for {medication_info['medication']} {medication_info['dosage']} to be taken {medication_info['frequency'].lower()}"
             if medication_info.get('duration'):
                 reminder_message += f" for {medication_info['duration']} days"
             
@@ -168,7 +257,7 @@ class AIAssistant(EventDispatcher):
             print(f"Error creating reminder json: {e}")
         
         # Generate a confirmation response
-        frequency = medication_info['frequency']
+        frequency = medication_info['frequency'].lower()
         medication = medication_info['medication']
         dosage = medication_info['dosage']
         duration_text = ""
@@ -223,20 +312,12 @@ class AIAssistant(EventDispatcher):
                     info['dosage'] = match.group(1) + ' ' + match.group(0).split()[1]
                 break
         
-        # Check for frequency
-        frequency_phrases = {
-            'once daily': ['once daily', 'once a day', 'daily', 'every day', 'each day'],
-            'twice daily': ['twice daily', 'twice a day', 'two times a day', 'bid', '2 times daily'],
-            'three times daily': ['three times daily', 'three times a day', 'tid', '3 times daily'],
-            'four times daily': ['four times daily', 'four times a day', 'qid', '4 times daily'],
-            'every 6 hours': ['every 6 hours', 'every six hours', 'q6h'],
-            'every 8 hours': ['every 8 hours', 'every eight hours', 'q8h'],
-            'every 12 hours': ['every 12 hours', 'every twelve hours', 'q12h']
-        }
-        
-        for freq, phrases in frequency_phrases.items():
-            if any(phrase in user_input.lower() for phrase in phrases):
-                info['frequency'] = freq
+        # Check for frequency; stored in the app's canonical form ('Twice daily')
+        # so the reminder gets the same cadence as one made on the Reminders screen
+        for match in FREQUENCY_PHRASE.finditer(user_input.lower()):
+            spec = parse_frequency(match.group(0))
+            if spec.recognized:
+                info['frequency'] = spec.label
                 break
         
         # Check for duration (look for patterns like 7 days, 10 days, etc.)
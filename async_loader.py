@@ -0,0 +1,24 @@
+import threading
+from kivy.clock import Clock
+
+def load_in_background(load, on_loaded, on_error=None):
+    """Run load() on a worker thread and hand its result to the Kivy main loop.
+
+    on_loaded(result) (or on_error(exception)) is called through
+    Clock.schedule_once, so it may safely touch widgets. Screens call this
+    from their constructors and show a placeholder until on_loaded runs, so
+    the first frame never waits on parsing a large data file.
+    """
+    def worker():
+        try:
+            result = load()
+        except Exception as e:
+            print(f"Error loading in background: {e}")
+            if on_error is not None:
+                Clock.schedule_once(lambda dt: on_error(e), 0)
+            return
+        Clock.schedule_once(lambda dt: on_loaded(result), 0)
+
+    thread = threading.Thread(target=worker, daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,93 @@
+"""
+Benchmark: adherence summaries over multi-year dose histories.
+
+Builds a synthetic history of 20 reminders taken three times a day for
+three years (about 66k dose events, some late, skipped or missed), folds
+it into a ReminderStore the way the journal is compacted (50 events per
+compaction) and compares reading the precomputed summary rows with
+rescanning the whole history to compute the same numbers.
+
+Runs in a temporary directory. Usage: python bench_adherence.py [reminders] [years]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+REMINDERS = 20
+YEARS = 3
+DOSES_PER_DAY = 3
+COMPACT_EVERY = 50
+
+def make_history(reminder_ids, years):
+    """Yield journal-style events for every reminder, in time order"""
+    step = timedelta(hours=24 // DOSES_PER_DAY)
+    due = datetime.now() - timedelta(days=365 * years)
+    for _ in range(365 * years * DOSES_PER_DAY):
+        following = (due + step).isoformat()
+        for reminder_id in reminder_ids:
+            roll = random.random()
+            if roll < 0.8:
+                kind, when = 'taken', due + timedelta(minutes=random.choice((0, 5, 20, 45, 90)))
+            elif roll < 0.9:
+                kind, when = 'skipped', due
+            else:
+                kind, when = 'missed', due
+            yield {'id': str(uuid.uuid4()), 'reminder_id': reminder_id, 'event': kind,
+                   'time': when.isoformat(), 'next_time': following}
+        due += step
+
+def timed(label, func, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"{label:<36}{elapsed * 1000:>10.3f} ms")
+    return result, elapsed
+
+def main():
+    reminders = int(sys.argv[1]) if len(sys.argv) > 1 else REMINDERS
+    years = int(sys.argv[2]) if len(sys.argv) > 2 else YEARS
+    os.chdir(tempfile.mkdtemp(prefix='bench_adherence_'))
+    from adherence import AdherenceStats, USER_SCOPE
+    from reminder_store import ReminderStore
+
+    store = ReminderStore()
+    reminder_ids = [str(uuid.uuid4()) for _ in range(reminders)]
+    with store.batch():
+        for position, reminder_id in enumerate(reminder_ids):
+            store.add_reminder({'id': reminder_id, 'medication_name': f'Medication {position}',
+                                'frequency': 'Three times daily', 'duration': 365 * years})
+    events = list(make_history(reminder_ids, years))
+    print(f"{len(events):,} dose events over {years} years, {reminders} reminders\n")
+
+    def compact_all():
+        for start in range(0, len(events), COMPACT_EVERY):
+            store.apply_dose_events(events[start:start + COMPACT_EVERY])
+    _, elapsed = timed(f"compact in chunks of {COMPACT_EVERY}", compact_all)
+    print(f"{'':<36}{elapsed / len(events) * 1e6:>10.1f} us per event")
+
+    summary, _ = timed("read user summary (1 row)", store.get_adherence, repeat=1000)
+    timed("read every summary row", store.get_all_adherence, repeat=100)
+
+    def rescan():
+        # What a dashboard would do without summaries: replay the whole history
+        stats, scheduled = {}, {}
+        for event in store.conn.execute('SELECT * FROM dose_events ORDER BY rowid'):
+            for scope in (event['reminder_id'], USER_SCOPE):
+                if scope not in stats:
+                    stats[scope] = AdherenceStats(scope)
+                stats[scope].add(event, scheduled.get(event['reminder_id']))
+            scheduled[event['reminder_id']] = event['next_time']
+        return stats[USER_SCOPE]
+    rescanned, _ = timed("rescan the full history", rescan)
+    assert rescanned.to_row() == summary.to_row()
+    print(f"\non time {summary.on_time_rate:.1%}, mean delay {summary.mean_delay_minutes:.1f} min, "
+          f"longest streak {summary.longest_streak}")
+    ReminderStore.close_instance()
+
+if __name__ == '__main__':
+    main()
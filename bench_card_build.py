@@ -0,0 +1,80 @@
+"""
+Benchmark: refreshing the Reminder screen's card list for N reminders.
+
+The screen keeps one record per reminder in its RecycleView's data and
+only builds the few cards that fit on screen; scrolling rebinds those to
+other records through refresh_view_attrs. This times what a refresh costs
+as N grows: ReminderScreen._reconcile_cards swapping in a new list, then
+patching a list where one reminder changed, and binding the recycled
+cards to every record (a scroll through the whole list). The per-reminder
+cost should stay flat, i.e. the total grows linearly.
+
+Runs in a temporary directory. Usage: python bench_card_build.py
+"""
+import os
+import tempfile
+import time
+import uuid
+from types import SimpleNamespace
+
+os.environ.setdefault('KIVY_NO_ARGS', '1')
+os.environ.setdefault('KIVY_NO_CONSOLELOG', '1')
+
+SIZES = [50, 100, 200, 500, 1000]
+
+# Cards the RecycleView creates for the screen's viewport
+VISIBLE_CARDS = 4
+
+def make_reminder(i):
+    return {
+        'id': str(uuid.uuid4()),
+        'medication_name': f'Medication {i}',
+        'dosage': '500 mg',
+        'frequency': 'Twice daily',
+        'duration': 7,
+        'notes': 'Take with food' if i % 2 else '',
+        'doses_taken': i % 14,
+        'next_time': None
+    }
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+def main():
+    os.chdir(tempfile.mkdtemp(prefix='bench_card_build_'))
+    # Imported after moving to the temp directory, where the store is opened
+    from kivy.uix.recycleview import RecycleView
+    from home import ReminderCard, ReminderScreen
+    from reminder_repository import ReminderRepository
+
+    repository = ReminderRepository()
+    cards = [ReminderCard() for _ in range(VISIBLE_CARDS)]
+    print(f"{'reminders':>10} {'swap (ms)':>10} {'patch (ms)':>11} {'bind all (ms)':>14} {'per bind (us)':>14}")
+    count = 0
+    for size in SIZES:
+        with repository.batch():
+            while count < size:
+                repository.add_reminder(make_reminder(count))
+                count += 1
+        # A stand-in for the screen: _reconcile_cards only uses its RecycleView
+        screen = SimpleNamespace(scroll_view=RecycleView(viewclass=ReminderCard))
+        rv = screen.scroll_view
+
+        swap = timed(lambda: ReminderScreen._reconcile_cards(screen, repository.get_snapshot()))
+        changed = rv.data[size // 2]
+        repository.update_reminder(changed['id'], notes='Changed')
+        patch = timed(lambda: ReminderScreen._reconcile_cards(screen, repository.get_snapshot()))
+
+        def bind_all():
+            for index, data in enumerate(rv.data):
+                cards[index % VISIBLE_CARDS].refresh_view_attrs(rv, index, data)
+        bind = timed(bind_all)
+
+        print(f"{size:>10} {swap * 1000:>10.2f} {patch * 1000:>11.2f} {bind * 1000:>14.1f} "
+              f"{bind / size * 1e6:>14.1f}")
+    ReminderRepository.close_instance()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark: load/save throughput of each available data file codec.
+
+Encodes and decodes 10k reminders and 100k chat messages with every codec
+codec.py found (stdlib json always, orjson/msgpack when installed).
+
+Usage: python bench_codec.py
+"""
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import codec
+
+ROUNDS = 3
+
+def make_reminders(count):
+    now = datetime.now()
+    return {
+        str(uuid.uuid4()): {
+            'medication_name': f'Medication {i}',
+            'dosage': '500 mg',
+            'frequency': 'Twice daily',
+            'duration': 7,
+            'notes': 'Take with food',
+            'created_at': now.isoformat(),
+            'last_taken': (now - timedelta(hours=i % 12)).isoformat(),
+            'next_time': (now + timedelta(hours=i % 12)).isoformat(),
+            'is_active': True,
+            'doses_taken': i % 14
+        }
+        for i in range(count)
+    }
+
+def make_messages(count):
+    return [
+        {
+            'id': str(uuid.uuid4()),
+            'username': f'user{i % 20}',
+            'message': f'Message number {i} about my medication schedule',
+            'image': None,
+            'timestamp': '14:08'
+        }
+        for i in range(count)
+    ]
+
+def best_of(func):
+    best = None
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main():
+    datasets = [
+        ('10k reminders', make_reminders(10000)),
+        ('100k messages', make_messages(100000))
+    ]
+    print(f"{'dataset':<15} {'codec':<8} {'size (KB)':>10} {'save (MB/s)':>12} {'load (MB/s)':>12}")
+    for label, data in datasets:
+        for name, current in codec.CODECS.items():
+            raw = current.dumps(data)
+            megabytes = len(raw) / 1e6
+            save = best_of(lambda: current.dumps(data))
+            load = best_of(lambda: current.loads(raw))
+            print(f"{label:<15} {name:<8} {len(raw) / 1024:>10.0f} "
+                  f"{megabytes / save:>12.1f} {megabytes / load:>12.1f}")
+
+if __name__ == '__main__':
+    main()
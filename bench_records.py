@@ -0,0 +1,100 @@
+"""
+Benchmark: memory per record and dict conversion speed of the record types.
+
+Builds 100k reminders, dose events and chat messages both as plain dicts
+and as the immutable __slots__ records from records.py / reminder_record.py,
+and reports the per-record overhead of each (measured with tracemalloc;
+the field values are shared, so only the containers are counted) and the
+from_dict/to_dict rate.
+
+Usage: python bench_records.py [count]
+"""
+import gc
+import sys
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta
+
+from records import ChatPost, DoseEvent
+from reminder_record import ReminderRecord
+
+COUNT = 100000
+
+def reminder_dicts(count):
+    now = datetime.now()
+    return [
+        {
+            'id': str(uuid.uuid4()),
+            'medication_name': f'Medication {i}',
+            'dosage': '500 mg',
+            'frequency': 'Twice daily',
+            'duration': 7,
+            'notes': 'Take with food',
+            'doses_taken': i % 14,
+            'next_time': (now + timedelta(hours=i % 12)).isoformat(),
+            'last_taken': (now - timedelta(hours=i % 12)).isoformat(),
+            'created_at': now.isoformat(),
+            'is_active': True,
+            'schema_version': 1,
+            'version': 0
+        }
+        for i in range(count)
+    ]
+
+def dose_dicts(count):
+    now = datetime.now().isoformat()
+    return [
+        {'id': str(uuid.uuid4()), 'reminder_id': str(uuid.uuid4()), 'event': 'taken',
+         'time': now, 'next_time': None}
+        for _ in range(count)
+    ]
+
+def message_dicts(count):
+    return [
+        {'id': str(uuid.uuid4()), 'username': f'user{i % 20}',
+         'message': f'Message number {i} about my medication schedule',
+         'image': None, 'timestamp': '14:08'}
+        for i in range(count)
+    ]
+
+def measure(build):
+    """Return (result, bytes allocated by build())"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else COUNT
+    print(f"{count:,} records each\n")
+    print(f"{'type':<16}{'dict B/rec':>12}{'record B/rec':>14}{'saved':>8}{'from_dict/s':>14}{'to_dict/s':>12}")
+    for name, cls, make in (
+        ('ReminderRecord', ReminderRecord, reminder_dicts),
+        ('DoseEvent', DoseEvent, dose_dicts),
+        ('ChatPost', ChatPost, message_dicts),
+    ):
+        # Both sides hold the same values, so measure the containers on top
+        # of values built beforehand
+        dicts = make(count)
+        copies, dict_bytes = measure(lambda: [dict(d) for d in dicts])
+        del copies
+        records, record_bytes = measure(lambda: [cls.from_dict(d) for d in dicts])
+        # Timed apart from measure(): tracemalloc slows allocation down
+        start = time.perf_counter()
+        records = [cls.from_dict(d) for d in dicts]
+        from_rate = count / (time.perf_counter() - start)
+        start = time.perf_counter()
+        for record in records:
+            record.to_dict()
+        to_rate = count / (time.perf_counter() - start)
+        saved = 1 - record_bytes / dict_bytes
+        print(f"{name:<16}{dict_bytes / count:>12.0f}{record_bytes / count:>14.0f}"
+              f"{saved:>8.0%}{from_rate:>14,.0f}{to_rate:>12,.0f}")
+        del records, dicts
+
+if __name__ == '__main__':
+    main()
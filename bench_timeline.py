@@ -0,0 +1,67 @@
+"""
+Benchmark: building and querying the dose timeline.
+
+Expands 10k reminders (about 150k scheduled doses) into a DoseTimeline,
+re-syncs after a few reminders change, and times the "due today" and
+"missed since" queries.
+
+Usage: python bench_timeline.py [reminders]
+"""
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from dose_timeline import DoseTimeline
+from reminder_record import ReminderRecord
+
+COUNT = 10000
+FREQUENCIES = ('Once daily', 'Twice daily', 'Three times daily', 'Four times daily', 'Every 6 hours')
+
+def make_records(count):
+    now = datetime.now()
+    records = []
+    for i in range(count):
+        created = now - timedelta(hours=random.randint(0, 96))
+        records.append(ReminderRecord({
+            'id': str(uuid.uuid4()),
+            'medication_name': f'Medication {i}',
+            'dosage': '500 mg',
+            'frequency': random.choice(FREQUENCIES),
+            'duration': random.randint(3, 10),
+            'doses_taken': random.randint(0, 3),
+            'next_time': (now + timedelta(hours=random.randint(-24, 24))).isoformat() if i % 3 else None,
+            'created_at': created.isoformat(),
+            'is_active': True,
+            'version': 0
+        }))
+    return records
+
+def timed(label, func):
+    start = time.perf_counter()
+    result = func()
+    print(f"{label:<28}{(time.perf_counter() - start) * 1000:>9.1f} ms")
+    return result
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else COUNT
+    records = make_records(count)
+    timeline = DoseTimeline()
+    timed(f"expand {count:,} reminders", lambda: timeline.sync(records))
+    print(f"{len(timeline):,} scheduled doses")
+    timed("sync, nothing changed", lambda: timeline.sync(records))
+
+    # A handful of doses taken since the last sync
+    for position in random.sample(range(count), 10):
+        records[position] = records[position].replace(doses_taken=records[position].doses_taken + 1)
+    timed("sync, 10 reminders changed", lambda: timeline.sync(records))
+
+    now = datetime.now()
+    today = timed("due today", lambda: timeline.due_today(now))
+    missed = timed("missed in the last 24h", lambda: timeline.missed_since(now - timedelta(days=1), now))
+    timed("missed per reminder (24h)", lambda: timeline.count_between(now - timedelta(days=1), now))
+    print(f"{len(today):,} doses due today, {len(missed):,} missed in the last 24h")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+import json
+
+# Optional fast codecs; the app falls back to the standard library without them
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+def _encode_record(obj):
+    """Encode objects with a to_dict() method (the records in records.py) as dicts"""
+    to_dict = getattr(obj, 'to_dict', None)
+    if to_dict is None:
+        raise TypeError(f"Cannot encode {type(obj).__name__}")
+    return to_dict()
+
+class JsonCodec:
+    """Standard library JSON"""
+    name = 'json'
+
+    def dumps(self, data, indent=None):
+        return json.dumps(data, indent=indent, default=_encode_record).encode('utf-8')
+
+    def loads(self, raw):
+        return json.loads(raw)
+
+class OrjsonCodec:
+    """orjson: JSON-compatible output, several times faster than json"""
+    name = 'orjson'
+
+    def dumps(self, data, indent=None):
+        # orjson only supports two-space indentation
+        return orjson.dumps(data, default=_encode_record, option=orjson.OPT_INDENT_2 if indent else 0)
+
+    def loads(self, raw):
+        return orjson.loads(raw)
+
+class MsgpackCodec:
+    """MessagePack: compact binary encoding"""
+    name = 'msgpack'
+
+    def dumps(self, data, indent=None):
+        return msgpack.packb(data, default=_encode_record, use_bin_type=True)
+
+    def loads(self, raw):
+        return msgpack.unpackb(raw, raw=False)
+
+# Available codecs in order of preference
+CODECS = {}
+if orjson is not None:
+    CODECS['orjson'] = OrjsonCodec()
+if msgpack is not None:
+    CODECS['msgpack'] = MsgpackCodec()
+CODECS['json'] = JsonCodec()
+
+# Codec used for writing; change with set_codec(). The data files are named
+# *.json and older app builds read them as JSON, so the default is always a
+# JSON codec; msgpack is only written after set_codec('msgpack')
+_current = {'name': 'orjson' if 'orjson' in CODECS else 'json'}
+
+# What load_file() can raise for a missing, unreadable or damaged data file
+DECODE_ERRORS = (ValueError, TypeError, OSError)
+if msgpack is not None:
+    DECODE_ERRORS += (msgpack.UnpackException,)
+
+def register_codec(codec):
+    """Add a codec object with name, dumps(data, indent) and loads(raw)"""
+    CODECS[codec.name] = codec
+
+def set_codec(name):
+    """Choose the codec used for writing data files"""
+    if name not in CODECS:
+        raise ValueError(f"Codec not available: {name}")
+    _current['name'] = name
+
+def get_codec(name=None):
+    """Return the named codec, or the one currently used for writing"""
+    return CODECS[name or _current['name']]
+
+def detect_codec(raw):
+    """Guess the codec of raw file bytes so older files keep loading after a switch"""
+    stripped = raw.lstrip()
+    if not stripped or stripped[:1] in b'{["-0123456789tfn':
+        # Text JSON; decode it with the fastest JSON codec available
+        return CODECS.get('orjson') or CODECS['json']
+    if 'msgpack' in CODECS:
+        return CODECS['msgpack']
+    raise ValueError("Data is not JSON and msgpack is not installed")
+
+def dumps(data, indent=None):
+    """Encode data with the current codec"""
+    return get_codec().dumps(data, indent=indent)
+
+def loads(raw):
+    """Decode bytes written by any known codec"""
+    if isinstance(raw, str):
+        raw = raw.encode('utf-8')
+    return detect_codec(raw).loads(raw)
+
+def load_file(path):
+    """Read and decode a data file written by any known codec"""
+    with open(path, 'rb') as f:
+        return loads(f.read())
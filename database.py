@@ -1,5 +1,10 @@
-import json
 import os
+import codec
+from persistence import WriteBehindWriter
+
+def merge_users(on_disk, users):
+    """Users saved by other processes plus ours; ours win for the same name"""
+    return dict(on_disk or {}, **users)
 
 class UserDatabase:
     def __init__(self):
@@ -9,15 +14,16 @@ class UserDatabase:
     def load_users(self):
         if os.path.exists(self.users_file):
             try:
-                with open(self.users_file, 'r') as f:
-                    return json.load(f)
-            except json.JSONDecodeError:
+                return codec.load_file(self.users_file)
+            except codec.DECODE_ERRORS as e:
+                print(f"Error loading users: {e}")
                 return {}
         return {}
 
     def save_users(self):
-        with open(self.users_file, 'w') as f:
-            json.dump(self.users, f, indent=4)
+        # Written in the background with an atomic replace, merged with users
+        # another copy of the app registered since we loaded the file
+        WriteBehindWriter().write(self.users_file, self.users, indent=4, merge=merge_users)
 
     def add_user(self, username, password):
         if username in self.users:
@@ -28,6 +34,9 @@ class UserDatabase:
         return True, "User registered successfully"
 
     def verify_user(self, username, password):
+        if username not in self.users:
+            # May have been registered by another copy of the app
+            self.users = dict(self.load_users(), **self.users)
         if username not in self.users:
             return False, "Username not found"
         
@@ -1,4 +1,17 @@
+import argparse
+import sys
 from medication_reminder import MedicationReminder
+from reminder_repository import ReminderRepository
+from user_session import UserSession
+
+parser = argparse.ArgumentParser(description="Delete every active reminder of a user")
+parser.add_argument('--user', help="whose reminders to delete (required once reminders are stored per user)")
+args = parser.parse_args()
+if args.user:
+    UserSession().login(args.user)
+elif UserSession().shared_data_adopted():
+    # The working directory no longer holds anyone's reminders
+    sys.exit("Reminders are stored per user; pass --user USERNAME")
 
 # Create a reminder manager instance
 reminder_manager = MedicationReminder()
@@ -7,11 +20,15 @@ reminder_manager = MedicationReminder()
 reminders = reminder_manager.get_active_reminders()
 print(f"Found {len(reminders)} reminders")
 
-# Delete each reminder
-for reminder in reminders:
-    reminder_id = reminder.get('id', '')
-    if reminder_id:
-        print(f'Deleting reminder: {reminder.get("medication_name", "Unknown")}')
-        reminder_manager.delete_reminder(reminder_id)
+# Delete each reminder, all in one transaction
+with reminder_manager.batch():
+    for reminder in reminders:
+        reminder_id = reminder.get('id', '')
+        if reminder_id:
+            print(f'Deleting reminder: {reminder.get("medication_name", "Unknown")}')
+            reminder_manager.delete_reminder(reminder_id)
+
+# Fold pending dose events into the store and close it
+ReminderRepository.close_instance()
 
-print('All reminders deleted successfully') 
\ No newline at end of file
+print('All reminders deleted successfully')
@@ -0,0 +1,143 @@
+import json
+import os
+import threading
+import uuid
+from datetime import datetime
+from file_lock import file_lock
+from records import DoseEvent
+
+# Kinds of dose events recorded in the journal
+DOSE_EVENT_TYPES = ('taken', 'skipped', 'snoozed', 'missed')
+
+def apply_dose_event(reminder, event):
+    """Fold one dose event into a reminder dict (the replay step).
+
+    Used both for the in-memory cache and when compacting into SQLite, so the
+    two can never disagree about what an event means.
+    """
+    if event['event'] == 'taken':
+        reminder['doses_taken'] = int(reminder.get('doses_taken') or 0) + 1
+        reminder['last_taken'] = event['time']
+    elif event['event'] == 'missed':
+        reminder['doses_missed'] = int(reminder.get('doses_missed') or 0) + 1
+    if 'next_time' in event:
+        reminder['next_time'] = event['next_time']
+    return reminder
+
+def dose_counts(record):
+    """The counters of a record that dose events add to, as a dict to fold events into"""
+    return {'doses_taken': record.doses_taken, 'doses_missed': record.doses_missed}
+
+def with_dose_event(record, event):
+    """Return a copy of an immutable ReminderRecord with one dose event folded in"""
+    changes = apply_dose_event(dose_counts(record), event)
+    return record.replace(**changes)
+
+class DoseJournal:
+    """
+    Append-only log of dose events (taken, skipped, snoozed, missed).
+
+    Recording a dose is one small appended JSON line plus an fsync, no matter
+    how many reminders exist. The reminder state is the last compacted
+    snapshot in SQLite plus a replay of the events still in the journal.
+    Compaction rotates the file to '<path>.compacting', folds those events
+    into the store and then removes the rotated file.
+
+    Appends and rotation hold an advisory lock on '<path>.lock', so several
+    processes (the app and a notifier, say) can share one journal: an append
+    never lands in a file another process has already rotated away.
+    """
+
+    def __init__(self, path='dose_journal.jsonl'):
+        self.path = path
+        self.compacting_path = path + '.compacting'
+        self.lock = threading.Lock()
+        self._file = None
+        self.pending_count = sum(1 for _ in self.read(self.path))
+
+    def append(self, reminder_id, event, next_time=None, time=None):
+        """Durably append one event and return it as a DoseEvent"""
+        return self.append_many([(reminder_id, event, next_time, time)])[0]
+
+    def append_many(self, entries):
+        """Durably append (reminder_id, event, next_time, time) entries with a single
+        write and fsync; time is a datetime, an ISO string or None for now.
+        Returns the DoseEvents in order."""
+        records = []
+        for reminder_id, event, next_time, time in entries:
+            if event not in DOSE_EVENT_TYPES:
+                raise ValueError(f"Unknown dose event: {event}")
+            records.append({
+                'id': str(uuid.uuid4()),
+                'reminder_id': reminder_id,
+                'event': event,
+                'time': time if isinstance(time, str) else (time or datetime.now()).isoformat(),
+                'next_time': next_time
+            })
+        if not records:
+            return []
+        lines = ''.join(json.dumps(record) + '\n' for record in records)
+        with self.lock, file_lock(self.path):
+            if self._file is not None and self._is_rotated():
+                # Another process rotated the journal since we opened it
+                self._file.close()
+                self._file = None
+            if self._file is None:
+                self._file = open(self.path, 'a')
+            self._file.write(lines)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self.pending_count += len(records)
+        return [DoseEvent(record) for record in records]
+
+    def read(self, path=None):
+        """Yield the events of a journal file in order"""
+        path = path or self.path
+        if not os.path.exists(path):
+            return
+        with open(path, 'r') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # A torn last line from a crash mid-append; the event never completed
+                    print(f"Skipping damaged journal line in {path}")
+
+    def _is_rotated(self):
+        try:
+            return os.fstat(self._file.fileno()).st_ino != os.stat(self.path).st_ino
+        except OSError:
+            return True
+
+    def rotate(self):
+        """Move the current journal aside for compaction.
+
+        Returns the rotated path, or None if there is nothing to compact.
+        """
+        with self.lock, file_lock(self.path):
+            if os.path.exists(self.compacting_path):
+                # Left over from an interrupted compaction; finish that first
+                return self.compacting_path
+            # Check the file rather than pending_count: other processes may have appended
+            if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+                self.pending_count = 0
+                return None
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            os.replace(self.path, self.compacting_path)
+            self.pending_count = 0
+        return self.compacting_path
+
+    def finish_rotation(self):
+        """Drop the rotated journal once its events are safely in the store"""
+        try:
+            os.remove(self.compacting_path)
+        except FileNotFoundError:
+            pass
+
+    def close(self):
+        with self.lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -0,0 +1,112 @@
+import heapq
+import itertools
+import weakref
+from datetime import datetime, timedelta
+from kivy.clock import Clock
+
+class DoseScheduler:
+    """
+    Single app-wide timer that refreshes reminder cards.
+    Implemented as a singleton so every card registers with the same scheduler.
+
+    Instead of one Clock interval per card, the scheduler keeps a min-heap of
+    next dose times and wakes only when something visible changes: a dose
+    becoming due, or the minute rolling over while a countdown is on screen.
+    Cards are held through weak references and only cards attached to the
+    window are refreshed, so detached cards cost nothing and are dropped.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(DoseScheduler, cls).__new__(cls)
+            cls._instance._cards = weakref.WeakValueDictionary()  # reminder_id -> card
+            cls._instance._heap = []  # (due_time, sequence, reminder_id)
+            cls._instance._sequence = itertools.count()
+            cls._instance._event = None
+            # Coalesce the reschedules of many cards registered in one frame
+            cls._instance._trigger_reschedule = Clock.create_trigger(cls._instance._reschedule)
+        return cls._instance
+
+    def register(self, card):
+        """Start tracking a card (replaces any older card for the same reminder)"""
+        self._cards[card.reminder_id] = card
+        self._push(card)
+        self._trigger_reschedule()
+
+    def unregister(self, card):
+        """Stop tracking a card (its heap entries are dropped lazily on the next wake)"""
+        if self._cards.get(card.reminder_id) is card:
+            del self._cards[card.reminder_id]
+
+    def update(self, card):
+        """Call after a card's next dose time changed (e.g. a dose was taken)"""
+        self._push(card)
+        self._trigger_reschedule()
+
+    def refresh(self, *args):
+        """Refresh every attached card now, e.g. when the reminder screen is shown"""
+        for card in self._attached_cards():
+            card.check_cooldown_status()
+        self._reschedule()
+
+    def stop(self):
+        """Cancel the pending wake-up"""
+        if self._event is not None:
+            self._event.cancel()
+            self._event = None
+
+    def _push(self, card):
+        if card.next_dose_time:
+            heapq.heappush(self._heap, (card.next_dose_time, next(self._sequence), card.reminder_id))
+
+    def _attached_cards(self):
+        """Cards that are still alive and shown in the window"""
+        return [card for card in list(self._cards.values()) if card.get_root_window() is not None]
+
+    def _is_current(self, due_time, reminder_id):
+        """A heap entry is stale once its card is gone or was rescheduled"""
+        card = self._cards.get(reminder_id)
+        return (card is not None and card.reminder_id == reminder_id
+                and card.next_dose_time == due_time)
+
+    def _reschedule(self, *args):
+        self.stop()
+
+        # Drop stale entries so the heap top is the next real due time
+        while self._heap and not self._is_current(self._heap[0][0], self._heap[0][2]):
+            heapq.heappop(self._heap)
+
+        attached = self._attached_cards()
+        if not attached:
+            # Nothing on screen; refresh() runs again when the screen is shown
+            return
+
+        now = datetime.now()
+        wake_at = None
+        if self._heap:
+            wake_at = self._heap[0][0]
+
+        # Countdown labels show minutes, so wake at the next minute rollover
+        # while any visible card is still cooling down
+        if any(card.next_dose_time and card.next_dose_time > now for card in attached):
+            next_minute = now.replace(second=0, microsecond=0) + timedelta(minutes=1)
+            if wake_at is None or next_minute < wake_at:
+                wake_at = next_minute
+
+        if wake_at is not None:
+            delay = max((wake_at - now).total_seconds(), 0)
+            self._event = Clock.schedule_once(self._on_wake, delay)
+
+    def _on_wake(self, dt):
+        self._event = None
+        now = datetime.now()
+
+        # Pop every dose that became due; their cards are refreshed below
+        while self._heap and self._heap[0][0] <= now:
+            heapq.heappop(self._heap)
+
+        for card in self._attached_cards():
+            card.check_cooldown_status()
+
+        self._reschedule()
@@ -0,0 +1,232 @@
+from datetime import datetime, timedelta
+import numpy as np
+from frequency import parse_frequency
+
+# Resolution of the timeline; dose times are never finer than a second
+DOSE_TIME_UNIT = 'datetime64[s]'
+
+# Above this share of changed reminders sync() re-sorts everything instead
+# of splicing the changed ones into the sorted arrays
+RESORT_FRACTION = 0.2
+
+def _timeline_key(record):
+    """What a reminder's dose times depend on.
+
+    version changes with every edit (frequency, duration, ...); dose
+    events don't bump it, so the dose columns are part of the key too.
+    """
+    return (record.version, record.doses_taken, record.doses_missed, record.next_time,
+            record.last_taken, record.created_at, record.is_active)
+
+def _anchor(record):
+    """Time of the first remaining dose: the scheduled next dose, else one
+    interval after the last one taken, else when the course was created"""
+    if record.next_time_dt is not None:
+        return record.next_time_dt
+    if record.last_taken_dt is not None:
+        return record.last_taken_dt + parse_frequency(record.frequency).interval
+    return record.created_at_dt
+
+def expand(records):
+    """Return one datetime64 array of remaining dose times per record, all built at once.
+
+    The remaining doses of a reminder are spaced by its dose interval,
+    starting at its anchor. Inactive or finished courses, and reminders
+    without any time to start from, get an empty array.
+    """
+    anchors, counts, steps = [], [], []
+    for record in records:
+        anchor = _anchor(record) if record.is_active else None
+        remaining = record.doses_remaining if anchor is not None else 0
+        anchors.append(anchor)
+        counts.append(max(remaining, 0))
+        steps.append(parse_frequency(record.frequency).interval_minutes * 60)
+    if not anchors:
+        return []
+    counts = np.array(counts, dtype=np.int64)
+    # Position of each dose within its own course: 0, 1, ..., count - 1
+    starts = np.cumsum(counts) - counts
+    positions = np.arange(counts.sum()) - np.repeat(starts, counts)
+    times = (np.repeat(np.array(anchors, dtype=DOSE_TIME_UNIT), counts)
+             + positions * np.repeat(np.array(steps, dtype=np.int64), counts).astype('timedelta64[s]'))
+    return np.split(times, np.cumsum(counts)[:-1])
+
+def find_missed_doses(records, now):
+    """Find every dose window that passed without the dose being taken, in one vectorized sweep.
+
+    A dose scheduled at T can be taken until the next one is due, T plus
+    the dose interval; once that has passed too the dose is missed. The
+    schedule runs on from each reminder's next_time. Missed doses use up
+    the course (see ReminderRecord.doses_remaining), so at most the
+    remaining doses can be missed; a course that runs out this way is
+    completed. Reminders not yet started (no next_time) have nothing to miss.
+
+    Returns (record, missed, next_times) for each reminder with missed
+    doses, where missed are the ISO times of the missed doses, oldest
+    first, and next_times the next dose time after each of them. Unless
+    the course ran out, the last of next_times is the dose still open at
+    now. Times keep microseconds so they stay exactly on the schedule.
+    """
+    candidates = [
+        record for record in records
+        if record.is_active and record.next_time_dt is not None and not record.is_completed
+    ]
+    if not candidates:
+        return []
+    anchors = np.array([record.next_time_dt for record in candidates], dtype='datetime64[us]')
+    steps = np.array([parse_frequency(record.frequency).interval_minutes for record in candidates],
+                     dtype=np.int64) * 60 * 1000000
+    remaining = np.array([record.doses_remaining for record in candidates], dtype=np.int64)
+    elapsed = (np.datetime64(now, 'us') - anchors).astype(np.int64)
+    # Windows that closed before now, up to the end of the course
+    passed = np.maximum(elapsed // steps, 0)
+    counts = np.minimum(passed, remaining)
+    hits = np.flatnonzero(counts)
+    if not len(hits):
+        return []
+    counts = counts[hits]
+    starts = np.cumsum(counts) - counts
+    positions = np.arange(counts.sum()) - np.repeat(starts, counts)
+    offsets = positions * np.repeat(steps[hits], counts)
+    missed = np.repeat(anchors[hits], counts) + offsets.astype('timedelta64[us]')
+    next_times = missed + np.repeat(steps[hits], counts).astype('timedelta64[us]')
+    bounds = np.cumsum(counts)[:-1]
+    return [
+        (candidates[position], missed_times.tolist(), following.tolist())
+        for position, missed_times, following in zip(
+            hits,
+            np.split(np.datetime_as_string(missed), bounds),
+            np.split(np.datetime_as_string(next_times), bounds)
+        )
+    ]
+
+def _to_datetime64(value):
+    return np.datetime64(value, 's')
+
+class DoseTimeline:
+    """
+    Every remaining scheduled dose of every reminder, as sorted NumPy arrays.
+
+    Each reminder is expanded into its dose times (see expand()) and cached
+    under its id together with _timeline_key(record), so sync() only
+    re-expands reminders whose schedule actually changed, all of them in one
+    vectorized pass. The doses of all reminders are kept in one sorted
+    datetime64 array with a parallel array of reminder slots, so "doses in
+    a window" is two searchsorted calls and a slice, and per-reminder counts
+    are a bincount.
+    """
+
+    def __init__(self):
+        self._keys = {}  # reminder_id -> _timeline_key of the cached times
+        self._times = {}  # reminder_id -> datetime64 array, ascending
+        self._slots = {}  # reminder_id -> slot number used in _owners
+        self._ids = []  # slot number -> reminder_id (None once deleted)
+        self._sorted_times = np.array([], dtype=DOSE_TIME_UNIT)
+        self._owners = np.array([], dtype=np.int64)
+
+    def sync(self, records):
+        """Bring the timeline up to date with the given (complete) set of records.
+
+        Returns the number of reminders that were re-expanded or removed.
+        """
+        current = set()
+        stale = []
+        for record in records:
+            current.add(record.id)
+            if self._keys.get(record.id) != _timeline_key(record):
+                stale.append(record)
+        removed = [reminder_id for reminder_id in self._keys if reminder_id not in current]
+        if not stale and not removed:
+            return 0
+
+        dropped = [self._slots[record.id] for record in stale if record.id in self._slots]
+        for reminder_id in removed:
+            del self._keys[reminder_id], self._times[reminder_id]
+            slot = self._slots.pop(reminder_id)
+            self._ids[slot] = None
+            dropped.append(slot)
+        for record, times in zip(stale, expand(stale)):
+            self._keys[record.id] = _timeline_key(record)
+            self._times[record.id] = times
+            if record.id not in self._slots:
+                self._slots[record.id] = len(self._ids)
+                self._ids.append(record.id)
+
+        changed = len(stale) + len(removed)
+        if changed > RESORT_FRACTION * max(len(self._keys), 1) or len(self._ids) > 2 * len(self._slots) + 64:
+            self._resort()
+        else:
+            self._splice(dropped, [record.id for record in stale])
+        return changed
+
+    def _resort(self):
+        """Rebuild the sorted arrays from every cached reminder (and renumber slots)"""
+        self._ids = list(self._times)
+        self._slots = {reminder_id: slot for slot, reminder_id in enumerate(self._ids)}
+        arrays = [self._times[reminder_id] for reminder_id in self._ids]
+        if not arrays:
+            self._sorted_times = np.array([], dtype=DOSE_TIME_UNIT)
+            self._owners = np.array([], dtype=np.int64)
+            return
+        times = np.concatenate(arrays)
+        owners = np.repeat(np.arange(len(arrays), dtype=np.int64), [len(a) for a in arrays])
+        order = np.argsort(times, kind='stable')
+        self._sorted_times, self._owners = times[order], owners[order]
+
+    def _splice(self, dropped_slots, added_ids):
+        """Drop some slots' doses and insert re-expanded ones without a full sort"""
+        keep = ~np.isin(self._owners, np.array(dropped_slots, dtype=np.int64))
+        times, owners = self._sorted_times[keep], self._owners[keep]
+        arrays = [self._times[reminder_id] for reminder_id in added_ids]
+        if arrays:
+            new_times = np.concatenate(arrays)
+            new_owners = np.repeat(
+                np.array([self._slots[reminder_id] for reminder_id in added_ids], dtype=np.int64),
+                [len(a) for a in arrays]
+            )
+            order = np.argsort(new_times, kind='stable')
+            new_times, new_owners = new_times[order], new_owners[order]
+            positions = np.searchsorted(times, new_times, side='right')
+            times = np.insert(times, positions, new_times)
+            owners = np.insert(owners, positions, new_owners)
+        self._sorted_times, self._owners = times, owners
+
+    def _window(self, start, end):
+        """Index range of the doses with start <= time < end (start None: from the beginning)"""
+        low = 0 if start is None else np.searchsorted(self._sorted_times, _to_datetime64(start), side='left')
+        high = np.searchsorted(self._sorted_times, _to_datetime64(end), side='left')
+        return low, max(high, low)
+
+    def times(self, reminder_id):
+        """The remaining dose times of one reminder as a datetime64 array"""
+        return self._times.get(reminder_id, np.array([], dtype=DOSE_TIME_UNIT))
+
+    def __len__(self):
+        """Number of scheduled doses across all reminders"""
+        return len(self._sorted_times)
+
+    def doses_between(self, start, end):
+        """(reminder_id, datetime) of every dose with start <= time < end, earliest first"""
+        low, high = self._window(start, end)
+        ids = self._ids
+        return [
+            (ids[slot], time.item())
+            for time, slot in zip(self._sorted_times[low:high], self._owners[low:high])
+        ]
+
+    def count_between(self, start, end):
+        """{reminder_id: number of doses with start <= time < end}"""
+        low, high = self._window(start, end)
+        counts = np.bincount(self._owners[low:high], minlength=len(self._ids))
+        ids = self._ids
+        return {ids[slot]: int(counts[slot]) for slot in np.flatnonzero(counts)}
+
+    def due_today(self, now=None):
+        """Doses still due from now until midnight, as (reminder_id, datetime)"""
+        now = now or datetime.now()
+        midnight = now.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+        return self.doses_between(now, midnight)
+
+    def missed_since(self, since, now=None):
+        """Doses scheduled between since and now that were not taken, as (reminder_id, datetime)"""
+        return self.doses_between(since, now or datetime.now())
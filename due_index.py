@@ -0,0 +1,62 @@
+import bisect
+
+class DueIndex:
+    """
+    Reminder ids kept in order of a timestamp (the next dose time by default).
+
+    Holds a sorted list of (time, reminder_id) pairs next to an id -> time
+    map, so moving one reminder after a dose, edit, add or delete is a pair
+    of binary searches instead of re-sorting every reminder, and "next k due"
+    or "due in a window" queries are a binary search plus a slice.
+    Reminders without a time (e.g. no next dose scheduled) are not indexed.
+    """
+
+    def __init__(self, items=()):
+        self.rebuild(items)
+
+    def rebuild(self, items):
+        """Replace the whole index with (reminder_id, time) pairs"""
+        self._times = {reminder_id: time for reminder_id, time in items if time is not None}
+        self._entries = sorted((time, reminder_id) for reminder_id, time in self._times.items())
+
+    def update(self, reminder_id, time):
+        """Move a reminder to a new time; None removes it from the index"""
+        old = self._times.get(reminder_id)
+        if old == time:
+            return
+        if old is not None:
+            position = bisect.bisect_left(self._entries, (old, reminder_id))
+            del self._entries[position]
+            del self._times[reminder_id]
+        if time is not None:
+            bisect.insort(self._entries, (time, reminder_id))
+            self._times[reminder_id] = time
+
+    def remove(self, reminder_id):
+        self.update(reminder_id, None)
+
+    def get(self, reminder_id):
+        """Return the indexed time of a reminder, or None"""
+        return self._times.get(reminder_id)
+
+    def __contains__(self, reminder_id):
+        return reminder_id in self._times
+
+    def __len__(self):
+        return len(self._entries)
+
+    def ids(self, reverse=False):
+        """All indexed ids, earliest first (latest first with reverse=True)"""
+        entries = reversed(self._entries) if reverse else self._entries
+        return [reminder_id for _, reminder_id in entries]
+
+    def first(self, k, start=None):
+        """Ids of the k earliest times at or after start (from the beginning if None)"""
+        position = 0 if start is None else bisect.bisect_left(self._entries, (start,))
+        return [reminder_id for _, reminder_id in self._entries[position:position + k]]
+
+    def between(self, start, end):
+        """Ids with start <= time < end, earliest first; start None means from the beginning"""
+        low = 0 if start is None else bisect.bisect_left(self._entries, (start,))
+        high = bisect.bisect_left(self._entries, (end,), low)
+        return [reminder_id for _, reminder_id in self._entries[low:high]]
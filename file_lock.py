@@ -0,0 +1,28 @@
+import os
+from contextlib import contextmanager
+
+# Advisory locks need fcntl; where it is missing (Windows) locking is skipped
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+@contextmanager
+def file_lock(path, shared=False):
+    """Hold an advisory lock on '<path>.lock' for the duration of the block.
+
+    Every process that reads-modifies-writes path takes the lock, so keep the
+    block short: read, merge and write, nothing else. A separate lock file is
+    used because the data files themselves are replaced by rename, which
+    would leave a lock on the old inode behind.
+    """
+    if fcntl is None:
+        yield
+        return
+    fd = os.open(f"{path}.lock", os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        yield
+    finally:
+        # Closing the descriptor releases the lock
+        os.close(fd)
@@ -0,0 +1,165 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import sys
+import threading
+import time
+
+# inotify(7) event masks for changes to files in a watched directory
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+def _open_inotify():
+    """Return (libc, fd) for a non-blocking inotify instance, or None where unsupported"""
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or None, use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+    except (OSError, AttributeError):
+        return None
+    if fd < 0:
+        return None
+    return libc, fd
+
+def file_signature(path):
+    """(mtime_ns, size) of a file, or None if it doesn't exist"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+class FileWatcher:
+    """
+    Tells subscribers when a data file was changed by someone else, such as
+    a second copy of the app or a sync tool.
+    Implemented as a singleton so all watched files share one thread.
+
+    On Linux (including Android) the thread sleeps on inotify watches of the
+    files' directories, without any timeout unless a directory couldn't be
+    watched; elsewhere, or if inotify is unavailable, it polls every
+    poll_interval seconds. Either way a file only counts as changed
+    when its (mtime, size) signature differs from the last one seen, so a
+    burst of events costs one stat per file. Code that writes a watched file
+    itself calls acknowledge() afterwards so its own writes are not reported.
+
+    Callbacks take the changed path and run on the watcher thread.
+    """
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    # Wait for a burst of writes to settle before comparing signatures
+    SETTLE_DELAY = 0.2
+
+    def __new__(cls, poll_interval=2.0):
+        with cls._instance_lock:
+            if cls._instance is None:
+                instance = super(FileWatcher, cls).__new__(cls)
+                instance.poll_interval = poll_interval
+                instance._lock = threading.Lock()
+                instance._callbacks = {}  # abspath -> [callback]
+                instance._signatures = {}  # abspath -> (mtime_ns, size)
+                instance._watched_dirs = {}  # directory -> inotify watch descriptor
+                instance._polled_dirs = set()  # directories inotify refused
+                instance._inotify = _open_inotify()
+                # Interrupts the untimed wait on inotify when polling becomes necessary
+                instance._wake_pipe = os.pipe() if instance._inotify is not None else None
+                instance._thread = threading.Thread(target=instance._run, daemon=True)
+                instance._thread.start()
+                cls._instance = instance
+        return cls._instance
+
+    @property
+    def uses_inotify(self):
+        return self._inotify is not None
+
+    def watch(self, path, callback):
+        """Call callback(path) whenever path changes on disk"""
+        path = os.path.abspath(path)
+        with self._lock:
+            callbacks = self._callbacks.setdefault(path, [])
+            if callback not in callbacks:
+                callbacks.append(callback)
+            if path not in self._signatures:
+                self._signatures[path] = file_signature(path)
+            self._watch_directory(os.path.dirname(path))
+
+    def unwatch(self, path, callback):
+        path = os.path.abspath(path)
+        with self._lock:
+            callbacks = self._callbacks.get(path, [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+            if not callbacks:
+                self._callbacks.pop(path, None)
+                self._signatures.pop(path, None)
+
+    def acknowledge(self, path):
+        """Record the current state of path as known, e.g. right after writing it"""
+        path = os.path.abspath(path)
+        with self._lock:
+            if path in self._signatures:
+                self._signatures[path] = file_signature(path)
+
+    def _watch_directory(self, directory):
+        # Watching the directory rather than the file also catches files that
+        # are atomically replaced or created later
+        if self._inotify is None or directory in self._watched_dirs or directory in self._polled_dirs:
+            return
+        libc, fd = self._inotify
+        wd = libc.inotify_add_watch(fd, directory.encode(sys.getfilesystemencoding()), WATCH_MASK)
+        if wd < 0:
+            print(f"Cannot watch {directory} with inotify; polling it instead")
+            self._polled_dirs.add(directory)
+            os.write(self._wake_pipe[1], b'.')
+            return
+        self._watched_dirs[directory] = wd
+
+    def _run(self):
+        while True:
+            if self._inotify is not None:
+                fd = self._inotify[1]
+                # Only directories inotify couldn't watch need a timeout to poll them
+                timeout = self.poll_interval * 5 if self._polled_dirs else None
+                ready, _, _ = select.select([fd, self._wake_pipe[0]], [], [], timeout)
+                if self._wake_pipe[0] in ready:
+                    os.read(self._wake_pipe[0], 512)
+                if fd in ready:
+                    time.sleep(self.SETTLE_DELAY)
+                    self._drain(fd)
+            else:
+                time.sleep(self.poll_interval)
+            self._check()
+
+    def _drain(self, fd):
+        """Discard queued inotify events; signatures decide what changed"""
+        while True:
+            try:
+                if not os.read(fd, 65536):
+                    return
+            except BlockingIOError:
+                return
+            except OSError as e:
+                print(f"Error reading inotify events: {e}")
+                return
+
+    def _check(self):
+        changed = []
+        with self._lock:
+            for path, old in list(self._signatures.items()):
+                new = file_signature(path)
+                if new != old:
+                    self._signatures[path] = new
+                    changed.append((path, list(self._callbacks.get(path, []))))
+        for path, callbacks in changed:
+            for callback in callbacks:
+                try:
+                    callback(path)
+                except Exception as e:
+                    print(f"Error in file watcher callback for {path}: {e}")
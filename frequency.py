@@ -0,0 +1,113 @@
+import re
+from datetime import timedelta
+from records import Record
+
+# "Every X hours" doses are counted over the waking hours of a day only
+ACTIVE_HOURS = 16
+
+# What an empty or unrecognised frequency is taken to mean
+DEFAULT_FREQUENCY = 'Once daily'
+
+# Parsed specs by the exact input string; bounded so free text can't grow it forever
+MAX_CACHED_SPECS = 1024
+
+_COUNT_WORDS = {
+    'once': 1, 'one': 1, 'twice': 2, 'two': 2, 'three': 3, 'thrice': 3,
+    'four': 4, 'five': 5, 'six': 6, 'eight': 8, 'twelve': 12
+}
+_DAILY_LABELS = {1: 'Once daily', 2: 'Twice daily', 3: 'Three times daily', 4: 'Four times daily'}
+# Prescription shorthand for N doses a day
+_ABBREVIATIONS = {
+    'daily': 1, 'qd': 1, 'od': 1, 'bid': 2, 'bd': 2, 'tid': 3, 'tds': 3, 'qid': 4, 'qds': 4
+}
+_TIMES_DAILY = re.compile(r'^(\w+)(?: times?| x)? ?(?:daily|a day|per day|each day|every day|/day)$')
+_EVERY_HOURS = re.compile(r'^(?:every|q) ?(\w+)? ?(?:hours?|hrs?|h)$')
+
+class FrequencySpec(Record):
+    """
+    A frequency phrase reduced to its cadence.
+
+    label is the canonical text shown in the app ('Twice daily',
+    'Every 6 hours'); interval_minutes is the time between two doses (the
+    cooldown after taking one); doses_per_day is how many doses a day of
+    the course counts. recognized is False when the phrase could not be
+    read, in which case the cadence is DEFAULT_FREQUENCY's and the label is
+    the phrase itself.
+    """
+    FIELDS = ('label', 'interval_minutes', 'doses_per_day', 'recognized')
+    __slots__ = FIELDS
+
+    @property
+    def interval(self):
+        return timedelta(minutes=self.interval_minutes)
+
+    @property
+    def interval_hours(self):
+        hours, minutes = divmod(self.interval_minutes, 60)
+        return hours if not minutes else self.interval_minutes / 60
+
+    def total_doses(self, duration):
+        """Doses in a course lasting duration days"""
+        return self.doses_per_day * max(int(duration or 1), 1)
+
+def _count(word, limit):
+    """The number a word stands for ('2', '2x', 'two'), or None if it isn't one in 1..limit"""
+    if word is None:
+        return 1
+    if word.endswith('x') and word[:-1].isdigit():
+        word = word[:-1]
+    count = int(word) if word.isdigit() else _COUNT_WORDS.get(word)
+    return count if count and count <= limit else None
+
+def _times_daily(count):
+    return FrequencySpec({
+        'label': _DAILY_LABELS.get(count, f"{count} times daily"),
+        'interval_minutes': 24 * 60 // count,
+        'doses_per_day': count,
+        'recognized': True
+    })
+
+def _every_hours(hours):
+    return FrequencySpec({
+        'label': f"Every {hours} hour{'s' if hours != 1 else ''}",
+        'interval_minutes': hours * 60,
+        'doses_per_day': max(ACTIVE_HOURS // hours, 1),
+        'recognized': True
+    })
+
+def _parse(text):
+    phrase = ' '.join((text or '').lower().replace('-', ' ').split()).rstrip('.')
+    if not phrase:
+        return _parse(DEFAULT_FREQUENCY)
+    if phrase in _ABBREVIATIONS:
+        return _times_daily(_ABBREVIATIONS[phrase])
+    if phrase in ('every day', 'each day', 'once a day'):
+        return _times_daily(1)
+    match = _TIMES_DAILY.match(phrase)
+    if match:
+        count = _count(match.group(1), limit=24)
+        if count:
+            return _times_daily(count)
+    match = _EVERY_HOURS.match(phrase)
+    if match:
+        hours = _count(match.group(1), limit=7 * 24)
+        if hours:
+            return _every_hours(hours)
+    default = _parse(DEFAULT_FREQUENCY)
+    return default.replace(label=(text or '').strip(), recognized=False)
+
+_specs = {}
+
+def parse_frequency(text):
+    """Return the FrequencySpec of a frequency phrase ('Twice daily', 'bid', 'every 6 hours', ...).
+
+    Specs are memoized by the exact input string, so a repeated lookup is a
+    single dict access.
+    """
+    spec = _specs.get(text)
+    if spec is None:
+        spec = _parse(text)
+        if len(_specs) >= MAX_CACHED_SPECS:
+            _specs.clear()
+        _specs[text] = spec
+    return spec
@@ -28,12 +28,25 @@ from kivy.uix.relativelayout import RelativeLayout
 from kivy.uix.switch import Switch
 from kivy.uix.dropdown import DropDown
 from database import UserDatabase  # Updated import
+from reminder_repository import ReminderRepository
+from frequency import parse_frequency
+from reminder_record import ReminderRecord, total_doses
+from records import ChatPost
+from dose_scheduler import DoseScheduler
+from notifier_service import notify_missed
+from persistence import WriteBehindWriter
+from async_loader import load_in_background
+from file_watcher import FileWatcher
 from kivy.uix.filechooser import FileChooserListView
 from kivy.uix.popup import Popup
 import json
 import uuid
+import codec
 from circular_button import CircularButton
 from kivy.uix.image import AsyncImage
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
 
 # Define language settings
 LANGUAGES = ['en', 'ro', 'ru']
@@ -57,6 +70,10 @@ LANG_DICT = {
         'logout': 'Logout',
         'add': 'ADD',
         'no_reminders_yet': 'No antibiotic reminders yet.\nTap + to create a new reminder.',
+        'loading': 'Loading...',
+        'history': 'History',
+        'course_history': 'Completed courses',
+        'no_course_history': 'No completed courses yet.',
         'ready': 'READY',
         'due_now': 'DUE NOW',
         'minutes': 'min',
@@ -114,6 +131,10 @@ LANG_DICT = {
         'logout': 'Deconectare',
         'add': 'ADAUGĂ',
         'no_reminders_yet': 'Nu există memento-uri pentru antibiotice.\nAtinge + pentru a crea primul reminder.',
+        'loading': 'Se încarcă...',
+        'history': 'Istoric',
+        'course_history': 'Tratamente încheiate',
+        'no_course_history': 'Niciun tratament încheiat încă.',
         'ready': 'GATA',
         'due_now': 'ACUM',
         'minutes': 'min',
@@ -168,6 +189,10 @@ LANG_DICT = {
         'logout': 'Выход',
         'add': 'ДОБАВИТЬ',
         'no_reminders_yet': 'Нет напоминаний о приеме антибиотиков.\nНажмите + чтобы создать первое напоминание.',
+        'loading': 'Загрузка...',
+        'history': 'История',
+        'course_history': 'Завершенные курсы',
+        'no_course_history': 'Завершенных курсов пока нет.',
         'ready': 'ГОТОВО',
         'due_now': 'СЕЙЧАС',
         'minutes': 'мин',
@@ -607,11 +632,18 @@ class RoundedButton(Button):
     def on_release(self):
         self._update_canvas()
 
-class ReminderCard(BoxLayout):
+class ReminderCard(RecycleDataViewBehavior, BoxLayout):
+    """Reminder card used as the recyclable view of ReminderScreen's list.
+    
+    The RecycleView creates only as many cards as fit on screen and rebinds
+    them to other reminders through refresh_view_attrs while scrolling.
+    """
     reminder_id = StringProperty('')
 
-    def __init__(self, reminder_data, **kwargs):
+    def __init__(self, reminder_data=None, **kwargs):
         super(ReminderCard, self).__init__(**kwargs)
+        if reminder_data is None:
+            reminder_data = {}
         self.orientation = 'vertical'
         self.size_hint_y = None
         self.height = dp(300)  # Increased height to accommodate larger buttons
@@ -621,34 +653,17 @@ class ReminderCard(BoxLayout):
         self.reminder_id = reminder_data.get('id', '')
         self.theme_manager = ThemeManager()
         
-        # Load saved data from JSON file
-        try:
-            if os.path.exists('reminders.json'):
-                with open('reminders.json', 'r') as f:
-                    saved_reminders = json.load(f)
-                    for saved_reminder in saved_reminders:
-                        if saved_reminder.get('id') == self.reminder_id:
-                            # Update reminder_data with saved values
-                            self.reminder_data.update(saved_reminder)
-                            break
-        except Exception as e:
-            print(f"Error loading saved reminder data: {e}")
-        
         # Store next dose time if available
-        self.next_dose_time = None
-        if self.reminder_data.get('next_time'):
-            try:
-                self.next_dose_time = datetime.fromisoformat(self.reminder_data['next_time'])
-                # If the next dose time is in the past, reset it
-                if self.next_dose_time < datetime.now():
-                    self.next_dose_time = None
-            except (ValueError, TypeError):
-                self.next_dose_time = None
+        self.next_dose_time = self._parse_next_time(self.reminder_data)
+        # If the next dose time is in the past, reset it
+        if self.next_dose_time is not None and self.next_dose_time < datetime.now():
+            self.next_dose_time = None
         
         # Set up doses tracking
         self.frequency = self.reminder_data.get('frequency', 'Once daily')
         self.duration = int(self.reminder_data.get('duration', 1))
         self.doses_taken = int(self.reminder_data.get('doses_taken', 0))
+        self.doses_missed = int(self.reminder_data.get('doses_missed') or 0)
         self.total_doses = self.calculate_total_doses()
         
         # Set up background with rounded corners
@@ -704,18 +719,8 @@ class ReminderCard(BoxLayout):
         description_layout.add_widget(self.description)
         
         # Add notes if available
-        if reminder_data.get('notes'):
-            self.notes = Label(
-                text=f"Notes: {reminder_data.get('notes')}",
-                font_size=dp(14),
-                color=(0.4, 0.4, 0.4, 1),
-                size_hint=(1, None),
-                height=dp(40),
-                halign='left',
-                valign='top'
-            )
-            self.notes.bind(size=self.notes.setter('text_size'))
-            description_layout.add_widget(self.notes)
+        self.description_layout = description_layout
+        self._set_notes(reminder_data.get('notes'))
         
         left_side.add_widget(description_layout)
         
@@ -805,8 +810,81 @@ class ReminderCard(BoxLayout):
         # Bind to position/size updates to keep cooldown circle positioned correctly
         self.bind(pos=self._update_cooldown_pos, size=self._update_cooldown_pos)
         
-        # Start periodic cooldown check (every minute)
-        Clock.schedule_interval(self.check_cooldown_status, 60)
+        # Let the shared scheduler refresh this card when its state changes
+        if self.reminder_id:
+            DoseScheduler().register(self)
+        
+        self.update_theme()
+
+    def _set_notes(self, notes):
+        """Show, update or remove the notes label"""
+        if notes:
+            if hasattr(self, 'notes'):
+                self.notes.text = f"Notes: {notes}"
+                return
+            self.notes = Label(
+                text=f"Notes: {notes}",
+                font_size=dp(14),
+                color=self.theme_manager.get_colors()['text_secondary'],
+                size_hint=(1, None),
+                height=dp(40),
+                halign='left',
+                valign='top'
+            )
+            self.notes.bind(size=self.notes.setter('text_size'))
+            self.description_layout.add_widget(self.notes)
+        elif hasattr(self, 'notes'):
+            self.description_layout.remove_widget(self.notes)
+            del self.notes
+
+    def refresh_view_attrs(self, rv, index, data):
+        """Bind this recycled card to the reminder record at index"""
+        if data is not self.reminder_data:
+            self.update_reminder_data(data)
+        # Cards waiting in the RecycleView's cache miss theme changes
+        if self.theme_is_dark != self.theme_manager.is_dark_mode:
+            self.update_theme()
+
+    def _parse_next_time(self, reminder_data):
+        """Return next_time as a datetime, reusing the record's cached parse when current"""
+        if isinstance(reminder_data, ReminderRecord):
+            return reminder_data.next_time_dt
+        next_time = reminder_data.get('next_time')
+        if not next_time:
+            return None
+        record = ReminderRepository().get_record(reminder_data.get('id')) if ReminderRepository._instance else None
+        if record is not None and record.next_time == next_time:
+            return record.next_time_dt
+        try:
+            return datetime.fromisoformat(next_time)
+        except (ValueError, TypeError):
+            return None
+    
+    def update_reminder_data(self, reminder_data):
+        """Patch this card in place with a record, possibly for another reminder"""
+        scheduler = DoseScheduler()
+        reminder_id = reminder_data.get('id', '')
+        if reminder_id != self.reminder_id:
+            # Recycled for a different reminder
+            scheduler.unregister(self)
+            self.reminder_id = reminder_id
+        self.reminder_data = reminder_data
+        
+        self.next_dose_time = self._parse_next_time(reminder_data)
+        
+        self.frequency = reminder_data.get('frequency', 'Once daily')
+        self.duration = int(reminder_data.get('duration', 1))
+        self.doses_taken = int(reminder_data.get('doses_taken', 0))
+        self.doses_missed = int(reminder_data.get('doses_missed') or 0)
+        self.total_doses = self.calculate_total_doses()
+        
+        self.title.text = reminder_data.get('medication_name', 'Medication')
+        self.description.text = self._get_description_text()
+        self._set_notes(reminder_data.get('notes'))
+        
+        self.check_cooldown_status()
+        if reminder_id:
+            scheduler.register(self)
 
     def _get_description_text(self):
         """Generate description text based on reminder data"""
@@ -814,58 +892,23 @@ class ReminderCard(BoxLayout):
         duration = self.reminder_data.get('duration', 1)
         dosage = self.reminder_data.get('dosage', 'N/A')
         
-        return f"Frequency: {frequency}\nDuration: {duration} day{'s' if duration > 1 else ''}\nDosage: {dosage}\nDoses taken: {self.doses_taken}/{self.total_doses}"
+        text = f"Frequency: {frequency}\nDuration: {duration} day{'s' if duration > 1 else ''}\nDosage: {dosage}\nDoses taken: {self.doses_taken}/{self.total_doses}"
+        if self.doses_missed:
+            text += f" ({self.doses_missed} missed)"
+        return text
 
     def calculate_total_doses(self):
         """Calculate total number of doses based on frequency and duration"""
-        frequency = self.reminder_data.get('frequency', 'Once daily')
-        duration = int(self.reminder_data.get('duration', 1))
-        
-        # Calculate doses per day based on frequency
-        if frequency == 'Once daily':
-            doses_per_day = 1
-        elif frequency == 'Twice daily':
-            doses_per_day = 2
-        elif frequency == 'Three times daily':
-            doses_per_day = 3
-        elif frequency == 'Four times daily':
-            doses_per_day = 4
-        elif frequency.startswith('Every '):
-            # Extract hours from "Every X hours"
-            try:
-                hours = int(frequency.split()[1])
-                # Calculate doses per day based on active hours (16 hours)
-                doses_per_day = 16 // hours
-            except (ValueError, IndexError):
-                doses_per_day = 1
-        else:
-            doses_per_day = 1
-        
-        return doses_per_day * duration
+        return total_doses(self.reminder_data)
 
     def get_cooldown_minutes(self, frequency):
         """Calculate cooldown time in minutes based on frequency"""
-        if frequency == 'Once daily':
-            return 24 * 60  # 24 hours
-        elif frequency == 'Twice daily':
-            return 12 * 60  # 12 hours
-        elif frequency == 'Three times daily':
-            return 6 * 60   # 8 hours
-        elif frequency == 'Four times daily':
-            return 4 * 60   # 6 hours
-        elif frequency.startswith('Every '):
-            try:
-                hours = int(frequency.split()[1])
-                return hours * 60
-            except (ValueError, IndexError):
-                return 24 * 60
-        else:
-            return 24 * 60
+        return parse_frequency(frequency).interval_minutes
 
     def check_cooldown_status(self, dt=None):
         now = datetime.now()
-        # Check if all doses have been taken
-        if self.doses_taken >= self.total_doses:
+        # Check if every dose of the course has been taken or missed
+        if self.doses_taken + self.doses_missed >= self.total_doses:
             self.take_button.disabled = True
             self.take_button.opacity = 0.5
             self.take_button.text = 'Completed'
@@ -928,30 +971,18 @@ class ReminderCard(BoxLayout):
         
         # Update UI
         self.check_cooldown_status()
+        DoseScheduler().update(self)
         
-        # Update reminder data
-        self.reminder_data['doses_taken'] = self.doses_taken
-        self.reminder_data['next_time'] = self.next_dose_time.isoformat()
-        
-        # Save to JSON file
+        # Record the dose in the append-only journal (one small write)
         try:
-            # Load existing reminders
-            reminders = []
-            if os.path.exists('reminders.json'):
-                with open('reminders.json', 'r') as f:
-                    reminders = json.load(f)
-            
-            # Update the specific reminder
-            for reminder in reminders:
-                if reminder.get('id') == self.reminder_id:
-                    reminder['doses_taken'] = self.doses_taken
-                    reminder['next_time'] = self.next_dose_time.isoformat()
-                    break
-            
-            # Save back to file
-            with open('reminders.json', 'w') as f:
-                json.dump(reminders, f)
-                
+            repository = ReminderRepository()
+            repository.record_dose(
+                self.reminder_id,
+                'taken',
+                next_time=self.next_dose_time.isoformat()
+            )
+            # Records are immutable; the repository now holds the updated one
+            self.reminder_data = repository.get_record(self.reminder_id) or self.reminder_data
             print(f"Saved reminder data: doses_taken={self.doses_taken}, next_time={self.next_dose_time}")
         except Exception as e:
             print(f"Error saving reminder data: {e}")
@@ -973,7 +1004,7 @@ class ReminderCard(BoxLayout):
     def update_theme(self):
         """Update theme colors"""
         colors = self.theme_manager.get_colors()
-        is_dark = self.theme_manager.is_dark_mode
+        is_dark = self.theme_is_dark = self.theme_manager.is_dark_mode
         
         # Update background
         if is_dark:
@@ -1027,6 +1058,17 @@ class ReminderScreen(BaseScreen):
         self.back_button.pos_hint = {'x': 0, 'top': 1}
         self.back_button.background_color = (0.8, 0.8, 0.8, 1)  # Grey color
         
+        # The logged-in user's reminder repository, opened in the background at
+        # login (see update_username); refresh the list whenever any code path
+        # (this screen, MedicationReminder, the AI assistant) changes a reminder
+        self.reminder_repository = None
+        self.snapshot = None  # ReminderSnapshot from the last load_reminders
+        self._trigger_load_reminders = Clock.create_trigger(self.load_reminders)
+        # Doses that passed while the app was closed or paused are settled on resume
+        app = App.get_running_app()
+        if app is not None:
+            app.bind(on_resume=self.reconcile_missed_doses)
+        
         # Initialize the medication reminder manager
         try:
             self.reminder_manager = MedicationReminder()
@@ -1060,18 +1102,36 @@ class ReminderScreen(BaseScreen):
         self.title_label.bind(size=self.title_label.setter('text_size'))
         
         title_bar.add_widget(self.title_label)
+        
+        # Completed courses are archived out of the list; this opens them
+        self.history_button = Button(
+            text=tr('history'),
+            font_size=dp(14),
+            size_hint=(None, None),
+            size=(dp(80), dp(36)),
+            pos_hint={'center_y': 0.5},
+            background_normal='',
+            background_color=(0.92, 0.92, 0.92, 1),
+            color=(0.2, 0.2, 0.2, 1)
+        )
+        self.history_button.bind(on_release=self.show_history)
+        title_bar.add_widget(self.history_button)
         self.main_layout.add_widget(title_bar)
         
-        # Content area for reminders with scroll view
-        self.scroll_view = ScrollView(
+        # Content area for reminders: a RecycleView only builds the cards
+        # that fit in the viewport and recycles them while scrolling
+        self.scroll_view = RecycleView(
             size_hint=(1, None),
             height=dp(480),  # Reduced height to leave more space for button
             pos_hint={'center_x': 0.5, 'top': 0.9}
         )
+        self.scroll_view.viewclass = ReminderCard
         
-        # This will hold our reminder cards
-        self.reminders_layout = GridLayout(
-            cols=1,
+        # Lays out the visible reminder cards
+        self.reminders_layout = RecycleBoxLayout(
+            orientation='vertical',
+            default_size=(None, dp(300)),
+            default_size_hint=(1, None),
             spacing=dp(15),
             padding=[dp(10), dp(10), dp(10), dp(120)],  # Added bottom padding to prevent overlap with button
             size_hint_y=None,  # Required for scrolling
@@ -1079,6 +1139,7 @@ class ReminderScreen(BaseScreen):
         self.reminders_layout.bind(minimum_height=self.reminders_layout.setter('height'))
         
         self.scroll_view.add_widget(self.reminders_layout)
+        self.scroll_view.layout_manager = self.reminders_layout
         self.main_layout.add_widget(self.scroll_view)
         
         # Create a circular Add button at the bottom center of the page
@@ -1112,9 +1173,9 @@ class ReminderScreen(BaseScreen):
         # Add to main layout
         self.main_layout.add_widget(add_button_container)
         
-        # No reminders message
+        # No reminders message (shows a loading placeholder until the repository is ready)
         self.no_reminders_label = Label(
-            text=tr('no_reminders_yet'),
+            text=tr('loading'),
             font_size=dp(18),
             color=(0.6, 0.6, 0.6, 1),
             size_hint=(1, None),
@@ -1365,9 +1426,6 @@ class ReminderScreen(BaseScreen):
         # Bind the dropdown selection to update the button text
         self.frequency_dropdown.bind(on_select=lambda instance, x: setattr(self.frequency_button, 'text', x))
         
-        # Load reminders on startup
-        Clock.schedule_once(self.load_reminders, 0.1)
-        
         # Now that all UI elements are created, we can call update_theme
         self.update_theme()
         
@@ -1388,7 +1446,7 @@ class ReminderScreen(BaseScreen):
         self.cancel_btn.text = tr('cancel')
         self.save_btn.text = tr('save')
         self.ai_help_btn.text = tr('ask_ai_assistant')
-        self.no_reminders_label.text = tr('no_reminders_yet')
+        self.no_reminders_label.text = tr('no_reminders_yet') if self.reminder_repository else tr('loading')
         
         # Update input hints
         self.name_input.hint_text = tr('enter_medication_name')
@@ -1595,58 +1653,158 @@ class ReminderScreen(BaseScreen):
         for child in self.form_container.walk(restrict=True):
             child.opacity = 1
     
+    def update_username(self, username):
+        """Open the user's reminders off the main thread as soon as they log in;
+        the screen shows the loading placeholder until they are cached"""
+        load_in_background(ReminderRepository, self._on_repository_loaded)
+    
+    def reset_user_data(self):
+        """Drop the previous user's reminders at logout"""
+        if self.reminder_repository is not None:
+            self.reminder_repository.unsubscribe(self._on_reminders_changed)
+            self.reminder_repository = None
+        self.snapshot = None
+        self.scroll_view.data = []
+        self.no_reminders_label.text = tr('loading')
+        self.no_reminders_label.opacity = 1
+    
+    def _on_repository_loaded(self, repository):
+        """Called on the main loop once the repository is open and cached"""
+        if repository is not ReminderRepository._instance:
+            # The user logged out while their reminders were loading
+            return
+        self.reminder_repository = repository
+        self.reminder_repository.subscribe(self._on_reminders_changed)
+        self.no_reminders_label.text = tr('no_reminders_yet')
+        self.reconcile_missed_doses()
+        self.load_reminders()
+    
+    def reconcile_missed_doses(self, *args):
+        """Record the doses missed since the app last ran as one bulk pass and
+        show a single summary notification for all of them"""
+        if self.reminder_repository is None:
+            return
+        try:
+            missed = self.reminder_repository.reconcile_missed_doses()
+        except Exception as e:
+            print(f"Error reconciling missed doses: {e}")
+            return
+        if missed:
+            print(f"Recorded {sum(count for _, count in missed)} missed doses")
+            notify_missed(missed)
+    
+    def show_history(self, instance):
+        """List archived courses from the archive index; a course's dose
+        history is only decompressed when it is tapped"""
+        if self.reminder_repository is None:
+            return
+        repository = self.reminder_repository
+        
+        content = BoxLayout(orientation='vertical', spacing=dp(10), padding=dp(10))
+        details_label = Label(
+            text='',
+            font_size=dp(14),
+            size_hint=(1, None),
+            height=dp(70),
+            halign='center',
+            valign='middle'
+        )
+        details_label.bind(size=details_label.setter('text_size'))
+        
+        listing = GridLayout(cols=1, spacing=dp(5), size_hint_y=None)
+        listing.bind(minimum_height=listing.setter('height'))
+        summaries = repository.get_archive_summaries()
+        for summary in summaries:
+            completed = (summary.get('completed_at') or '')[:10]
+            course_btn = Button(
+                text=f"{summary['medication_name']} {summary['dosage']} - {completed}",
+                font_size=dp(14),
+                size_hint_y=None,
+                height=dp(44)
+            )
+            course_btn.bind(on_release=lambda btn, reminder_id=summary['id']:
+                            self._show_archived_course(repository, reminder_id, details_label))
+            listing.add_widget(course_btn)
+        if not summaries:
+            listing.add_widget(Label(text=tr('no_course_history'), size_hint_y=None, height=dp(44)))
+        
+        history_scroll = ScrollView()
+        history_scroll.add_widget(listing)
+        content.add_widget(history_scroll)
+        content.add_widget(details_label)
+        
+        close_btn = Button(text='Close', size_hint=(1, None), height=dp(44))
+        content.add_widget(close_btn)
+        
+        popup = Popup(title=tr('course_history'), content=content, size_hint=(0.9, 0.8))
+        close_btn.bind(on_release=popup.dismiss)
+        popup.open()
+    
+    def _show_archived_course(self, repository, reminder_id, details_label):
+        """Read one archived course off the main thread and show its dose summary"""
+        def show(course):
+            if course is None:
+                details_label.text = ''
+                return
+            taken = [e['time'][:16].replace('T', ' ') for e in course.get('dose_events', []) if e['event'] == 'taken']
+            text = f"{course['medication_name']} {course['dosage']}, {course.get('frequency', '')}\n"
+            text += f"Doses taken: {course.get('doses_taken', 0)}"
+            if taken:
+                text += f"\n{taken[0]} - {taken[-1]}"
+            details_label.text = text
+        
+        details_label.text = tr('loading')
+        load_in_background(lambda: repository.get_archived_course(reminder_id), show)
+    
+    def _on_reminders_changed(self, action, reminder_id):
+        """Repository change notification; coalesced into one reload per frame"""
+        self._trigger_load_reminders()
+    
+    def on_enter(self, *args):
+        """Bring card countdowns up to date when the screen is shown again"""
+        DoseScheduler().refresh()
+    
     def load_reminders(self, dt=None):
-        """Load reminders from persistent storage"""
+        """Load reminders from persistent storage and reconcile the cards on screen"""
+        if self.reminder_repository is None:
+            # Still loading; _on_repository_loaded calls us again
+            return
         try:
-            # Clear existing reminders
-            self.reminders_layout.clear_widgets()
+            # Load one snapshot per refresh, already sorted by next dose time
+            # (latest first, reminders without a next dose at the end)
+            snapshot = self.reminder_repository.get_snapshot()
             
-            # Load reminders from JSON file
-            reminders = []
-            if os.path.exists('reminders.json'):
-                with open('reminders.json', 'r') as f:
-                    reminders = json.load(f)
+            # Missed doses were settled by reconcile_missed_doses, so a past
+            # next_time is the dose still open now and its card shows it as due
+            self.snapshot = snapshot
+            reminders = snapshot.reminders
             
-            # Sort reminders by next dose time, handling None values
-            def get_sort_key(reminder):
-                next_time = reminder.get('next_time')
-                if next_time is None:
-                    return datetime.min.isoformat()  # Put None values at the end
-                try:
-                    return next_time
-                except (ValueError, TypeError):
-                    return datetime.min.isoformat()
-            
-            reminders.sort(key=get_sort_key, reverse=True)
+            self._reconcile_cards(self.snapshot)
             
             # Check if there are truly no reminders
-            if not reminders:
-                self.no_reminders_label.opacity = 1
-            else:
-                self.no_reminders_label.opacity = 0
-                
-                # Create reminder cards
-                for reminder in reminders:
-                    # Convert next_time string back to datetime if it exists
-                    if reminder.get('next_time'):
-                        try:
-                            next_time = datetime.fromisoformat(reminder['next_time'])
-                            # If the next dose time is in the past, reset it
-                            if next_time < datetime.now():
-                                reminder['next_time'] = None
-                            else:
-                                reminder['next_time'] = next_time.isoformat()
-                        except (ValueError, TypeError):
-                            reminder['next_time'] = None
-                    
-                    card = ReminderCard(reminder)
-                    self.reminders_layout.add_widget(card)
-                    
-                print(f"Loaded {len(reminders)} reminders")
+            self.no_reminders_label.opacity = 0 if reminders else 1
+            print(f"Loaded {len(reminders)} reminders")
                 
         except Exception as e:
             print(f"Error loading reminders: {e}")
 
+    def _reconcile_cards(self, snapshot):
+        """Update the RecycleView data to match the snapshot, keyed by reminder_id.
+        
+        When the set and order of reminders is unchanged only the changed
+        records are replaced, so the RecycleView rebinds just those cards.
+        Otherwise the data list is swapped and the visible cards are rebound.
+        """
+        data = self.scroll_view.data
+        new_ids = [reminder['id'] for reminder in snapshot]
+        if [item.get('id') for item in data] != new_ids:
+            self.scroll_view.data = snapshot.reminders
+            return
+        
+        for position, reminder in enumerate(snapshot):
+            if data[position] != reminder:
+                data[position] = reminder
+
     def show_add_reminder(self, instance):
         """Show the add reminder form"""
         self.is_adding_reminder = True
@@ -1673,12 +1831,7 @@ class ReminderScreen(BaseScreen):
     
     def show_edit_reminder(self, reminder_id):
         """Show the edit reminder form"""
-        # Load reminders from JSON file
-        reminders = []
-        if os.path.exists('reminders.json'):
-            with open('reminders.json', 'r') as f:
-                reminders = json.load(f)
-        reminder = next((r for r in reminders if r.get('id') == reminder_id), None)
+        reminder = self.snapshot.get(reminder_id) if self.snapshot else None
         if not reminder:
             return
         self.is_adding_reminder = False
@@ -1700,15 +1853,10 @@ class ReminderScreen(BaseScreen):
             self.ai_help_btn.disabled = False
 
     def delete_reminder(self, reminder_id):
-        """Delete a reminder from reminders.json by ID"""
-        reminders = []
-        if os.path.exists('reminders.json'):
-            with open('reminders.json', 'r') as f:
-                reminders = json.load(f)
-        reminders = [r for r in reminders if r.get('id') != reminder_id]
-        with open('reminders.json', 'w') as f:
-            json.dump(reminders, f)
-        self.load_reminders()
+        """Delete a reminder from the reminder repository by ID"""
+        # The repository notifies _on_reminders_changed, which refreshes the list
+        if self.reminder_repository is not None:
+            self.reminder_repository.delete_reminder(reminder_id)
 
     def hide_form(self, instance=None):
         """Hide the add/edit reminder form"""
@@ -1722,20 +1870,19 @@ class ReminderScreen(BaseScreen):
             self.ai_help_btn.disabled = True
         
         # Show no reminders message if needed
-        if not self.reminders_layout.children:
+        if not self.scroll_view.data:
             self.no_reminders_label.opacity = 1
     
     def save_reminder(self, instance):
         """Save or update reminder data to persistent storage"""
+        if self.reminder_repository is None:
+            print("Reminders are still loading")
+            return
         try:
             # Validate required fields only when saving
             if not self.name_input.text.strip():
                 print("Medication name is required")
                 return
-            reminders = []
-            if os.path.exists('reminders.json'):
-                with open('reminders.json', 'r') as f:
-                    reminders = json.load(f)
             if self.is_adding_reminder or not self.editing_reminder_id:
                 # Create new reminder
                 reminder_data = {
@@ -1746,24 +1893,23 @@ class ReminderScreen(BaseScreen):
                     'dosage': self.dosage_input.text.strip(),
                     'notes': self.notes_input.text.strip(),
                     'doses_taken': 0,
-                    'next_time': None
+                    'next_time': None,
+                    'created_at': datetime.now().isoformat(),
+                    'is_active': True
                 }
-                reminders.append(reminder_data)
+                self.reminder_repository.add_reminder(reminder_data)
             else:
                 # Update existing reminder
-                for reminder in reminders:
-                    if reminder.get('id') == self.editing_reminder_id:
-                        reminder['medication_name'] = self.name_input.text.strip()
-                        reminder['frequency'] = self.frequency_button.text
-                        reminder['duration'] = int(self.duration_input.text) if self.duration_input.text.isdigit() else 1
-                        reminder['dosage'] = self.dosage_input.text.strip()
-                        reminder['notes'] = self.notes_input.text.strip()
-                        break
-            with open('reminders.json', 'w') as f:
-                json.dump(reminders, f)
+                self.reminder_repository.update_reminder(
+                    self.editing_reminder_id,
+                    medication_name=self.name_input.text.strip(),
+                    frequency=self.frequency_button.text,
+                    duration=int(self.duration_input.text) if self.duration_input.text.isdigit() else 1,
+                    dosage=self.dosage_input.text.strip(),
+                    notes=self.notes_input.text.strip()
+                )
             print(f"Saved reminder(s)")
             self.hide_form()
-            self.load_reminders()
         except Exception as e:
             print(f"Error saving reminder: {e}")
 
@@ -1935,9 +2081,9 @@ class ReminderScreen(BaseScreen):
             else:
                 self.add_text.color = (0.2, 0.7, 0.3, 1)  # Original green
                 
-        # Update all reminder cards
+        # Update the cards on screen; recycled ones catch up in refresh_view_attrs
         for child in self.reminders_layout.children:
-            if isinstance(child, ReminderCard) and hasattr(child, 'update_theme'):
+            if isinstance(child, ReminderCard):
                 child.update_theme()
 
     def add_message(self, text, is_user=True):
@@ -2788,13 +2934,16 @@ class VoiceScreen(BaseScreen):
             # Explicitly call the add_reminder method with proper arguments
             print("Calling add_reminder method")
             
-            reminder_id = reminder_screen.reminder_manager.add_reminder(
-                medication_name=medication_name,
-                dosage=dosage,
-                frequency=frequency,
-                duration=duration,
-                notes="Created by AI assistant"
-            )
+            manager = reminder_screen.reminder_manager
+            # One transaction; nothing is left half-created if it fails
+            with manager.batch():
+                reminder_id = manager.add_reminder(
+                    medication_name=medication_name,
+                    dosage=dosage,
+                    frequency=frequency,
+                    duration=duration,
+                    notes="Created by AI assistant"
+                )
             
             print(f"Reminder created with ID: {reminder_id}")
             
@@ -3090,7 +3239,7 @@ class SettingsScreen(BaseScreen):
 
     def logout(self, instance):
         app = App.get_running_app()
-        app.current_user = None
+        app.on_logout()
         self.manager.transition = SlideTransition(direction='right')
         self.manager.current = 'login'
 
@@ -3126,7 +3275,7 @@ class HomeScreen(BaseScreen):
         
         self.theme_manager = ThemeManager()
         self.messages = []
-        self.load_messages()
+        self.messages_loaded = False
         
         # Main layout
         self.main_layout = FloatLayout()
@@ -3271,8 +3420,9 @@ class HomeScreen(BaseScreen):
         # Now that all widgets are initialized, update the theme
         self.update_theme()
         
-        # Refresh chat every 5 seconds
-        Clock.schedule_interval(self.refresh_chat, 5)
+        # Load chat history off the main thread, with a placeholder meanwhile;
+        # the periodic refresh starts once it is loaded (see _on_messages_loaded)
+        self.load_messages()
 
     def show_post_popup(self, instance):
         content = BoxLayout(orientation='vertical', padding=dp(20), spacing=dp(10))
@@ -3403,13 +3553,13 @@ class HomeScreen(BaseScreen):
         if not username:
             return
         
-        message_data = {
+        message_data = ChatPost({
             'id': str(uuid.uuid4()),  # Add unique ID for each message
             'username': username,
             'message': message_text,
             'image': getattr(self, 'selected_image', None),
             'timestamp': datetime.now().strftime("%H:%M")
-        }
+        })
         
         self.messages.insert(0, message_data)  # Insert at beginning for newest first
         self.save_messages()
@@ -3529,20 +3679,80 @@ class HomeScreen(BaseScreen):
         self.canvas.ask_update()
 
     def load_messages(self):
+        """Parse chat_messages.json on a worker thread, then show the messages"""
+        self.chat_layout.add_widget(Label(
+            text=tr('loading'),
+            font_size=dp(16),
+            color=(0.6, 0.6, 0.6, 1),
+            size_hint_y=None,
+            height=dp(40)
+        ))
+        load_in_background(self._read_messages, self._on_messages_loaded)
+    
+    def _read_messages(self):
+        """Runs on the loader thread"""
         try:
             if os.path.exists('chat_messages.json'):
-                with open('chat_messages.json', 'r') as f:
-                    self.messages = json.load(f)
+                return [ChatPost.from_dict(message) for message in codec.load_file('chat_messages.json')]
         except Exception as e:
             print(f"Error loading messages: {e}")
-            self.messages = []
+        return []
+    
+    def _on_messages_loaded(self, messages):
+        # Keep anything posted while the file was still loading
+        posted = bool(self.messages)
+        self.messages = self.messages + messages
+        self.messages_loaded = True
+        if posted:
+            # save_messages skipped those while loading; write the merged list now
+            self.save_messages()
+        self.refresh_chat(0)
+        # Refresh chat every 5 seconds; started only now so it can't clear the
+        # loading placeholder before the history is shown
+        Clock.schedule_interval(self.refresh_chat, 5)
+        # Pick up messages another copy of the app writes to the shared feed
+        FileWatcher().watch('chat_messages.json', self._on_chat_file_changed)
+    
+    def _on_chat_file_changed(self, path):
+        """Runs on the watcher thread when someone else rewrote the chat file"""
+        messages = self._read_messages()
+        Clock.schedule_once(lambda dt: self._merge_messages(messages), 0)
+    
+    def _merge_messages(self, messages):
+        """Merge the chat file back in by message id, redrawing only if a message changed"""
+        known = {message.get('id'): message for message in self.messages}
+        if all(known.get(message.get('id')) == message for message in messages):
+            return
+        # Our own newest messages may not have been written yet; keep them on top
+        on_disk = {message.get('id') for message in messages}
+        unsaved = [message for message in self.messages if message.get('id') not in on_disk]
+        self.messages = unsaved + messages
+        self.refresh_chat(0)
 
     def save_messages(self):
-        try:
-            with open('chat_messages.json', 'w') as f:
-                json.dump(self.messages, f)
-        except Exception as e:
-            print(f"Error saving messages: {e}")
+        if not self.messages_loaded:
+            # Saving now would overwrite the history that is still loading;
+            # _on_messages_loaded saves the merged list instead
+            return
+        # Queued for the background writer; bursts of saves become one write.
+        # ChatPosts are immutable, so the writer's shallow copy of the list is
+        # safe and they are turned into dicts by the codec on the writer thread
+        WriteBehindWriter().write(
+            'chat_messages.json', self.messages,
+            callback=self._on_messages_saved, merge=self._merge_saved_messages
+        )
+    
+    @staticmethod
+    def _merge_saved_messages(on_disk, messages):
+        """Runs on the writer thread under the chat file's lock: keep messages
+        another copy of the app saved that this one hasn't merged in yet"""
+        ids = {message.get('id') for message in messages}
+        return messages + [message for message in on_disk or [] if message.get('id') not in ids]
+    
+    def _on_messages_saved(self, path, error):
+        # Our own write; the file watcher shouldn't report it as a change
+        if error is None:
+            FileWatcher().acknowledge(path)
 
     def add_message_to_chat(self, message_data, scroll_to_bottom=False):
         """Add a new message to the chat"""
@@ -11,8 +11,8 @@ from kivy.uix.anchorlayout import AnchorLayout
 from kivy.metrics import dp
 from kivy.graphics import Color, Rectangle, RoundedRectangle
 from kivy.clock import Clock
-import json
 import os
+import codec
 # Import only what's available in home.py
 from home import HomeScreen, ReminderScreen, BaseScreen, VoiceScreen, InitialScreen, SignupScreen, MediScanScreen
 from home import IconButton, tr, RoundedButton
@@ -25,7 +25,11 @@ from register import RegisterScreen
 from cream_button import CreamButton
 from kivy.uix.image import Image
 from language_manager import LanguageManager
-from database import UserDatabase
+from database import UserDatabase, merge_users
+from dose_scheduler import DoseScheduler
+from reminder_repository import ReminderRepository
+from persistence import WriteBehindWriter
+from user_session import UserSession
 
 # User database management
 class UserDatabase:
@@ -36,15 +40,15 @@ class UserDatabase:
     def load_users(self):
         if os.path.exists(self.db_file):
             try:
-                with open(self.db_file, 'r') as f:
-                    return json.load(f)
+                return codec.load_file(self.db_file)
             except:
                 return {}
         return {}
     
     def save_users(self):
-        with open(self.db_file, 'w') as f:
-            json.dump(self.users, f)
+        # Written in the background with an atomic replace, merged with users
+        # another copy of the app registered since we loaded the file
+        WriteBehindWriter().write(self.db_file, self.users, merge=merge_users)
     
     def add_user(self, username, password):
         if username in self.users:
@@ -55,6 +59,9 @@ class UserDatabase:
         return True, "User registered successfully"
     
     def verify_user(self, username, password):
+        if username not in self.users:
+            # May have been registered by another copy of the app
+            self.users = dict(self.load_users(), **self.users)
         if username not in self.users:
             return False, "Username not found"
         
@@ -286,6 +293,8 @@ class MainApp(App):
         self.current_user = None
         self.theme_manager = ThemeManager()
         self.language_manager = LanguageManager()
+        # One scheduler refreshes every reminder card's cooldown
+        self.dose_scheduler = DoseScheduler()
         
         # Set window size to match Android phone screen
         Window.size = (400, 680)  # Common Android phone screen size
@@ -319,13 +328,30 @@ class MainApp(App):
         colors = self.theme_manager.get_colors()
         Window.clearcolor = colors['background']
 
+    def on_stop(self):
+        self.dose_scheduler.stop()
+        # Fold pending dose events into the user's database before exiting
+        ReminderRepository.close_instance()
+        # Make sure queued JSON saves reach disk
+        WriteBehindWriter().flush()
+
     def on_login_success(self, username):
         self.current_user = username
+        # Point storage at this user's data; it is opened on first use
+        UserSession().login(username)
         # Update username in all screens that need it
         for screen in self.root.screens:
             if hasattr(screen, 'update_username'):
                 screen.update_username(username)
         self.root.current = 'home'
 
+    def on_logout(self):
+        self.current_user = None
+        # Close the user's reminder files and clear what screens still show
+        UserSession().logout()
+        for screen in self.root.screens:
+            if hasattr(screen, 'reset_user_data'):
+                screen.reset_user_data()
+
 if __name__ == '__main__':
     MainApp().run() 
\ No newline at end of file
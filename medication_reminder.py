@@ -1,79 +1,62 @@
-import json
-import os
 import uuid
 from datetime import datetime, timedelta
+from frequency import parse_frequency
+from reminder_repository import ReminderRepository
 
 class MedicationReminder:
-    """Class to manage medication reminders"""
+    """Class to manage medication reminders.
     
-    def __init__(self):
-        self.reminders_file = "medication_reminders.json"
-        self.reminders = self.load_reminders()
+    Reminders live in the shared ReminderRepository (the same data the
+    Reminder screen shows), so nothing here re-reads a file per action.
+    Dates are exposed as datetime objects, as before.
+    """
+    
+    @property
+    def repository(self):
+        """The shared repository, opened on first use rather than at construction"""
+        return ReminderRepository()
+    
+    @property
+    def reminders(self):
+        """All reminders keyed by id, with datetime next_time/last_taken"""
+        return {r.id: self._to_api(r) for r in self.repository.get_records()}
+    
+    def _to_api(self, record):
+        """Return a reminder dict using the record's cached datetime values"""
+        reminder = record.to_dict()
+        reminder['next_time'] = record.next_time_dt
+        reminder['last_taken'] = record.last_taken_dt
+        return reminder
     
     def load_reminders(self):
-        """Load reminders from file or return empty dict if file doesn't exist"""
-        if os.path.exists(self.reminders_file):
-            try:
-                with open(self.reminders_file, 'r') as f:
-                    reminders = json.load(f)
-                    
-                    # Convert string ISO dates back to datetime objects
-                    for reminder_id, reminder in reminders.items():
-                        # Convert next_time
-                        if reminder.get('next_time'):
-                            try:
-                                reminder['next_time'] = datetime.fromisoformat(reminder['next_time'])
-                            except (ValueError, TypeError):
-                                reminder['next_time'] = None
-                        
-                        # Convert last_taken
-                        if reminder.get('last_taken'):
-                            try:
-                                reminder['last_taken'] = datetime.fromisoformat(reminder['last_taken'])
-                            except (ValueError, TypeError):
-                                reminder['last_taken'] = None
-                    
-                    return reminders
-            except Exception as e:
-                print(f"Error loading reminders: {e}")
-                return {}
-        return {}
+        """Reload reminders from storage into the shared cache"""
+        self.repository.reload()
+        return self.reminders
     
     def save_reminders(self):
-        """Save reminders to file"""
-        try:
-            # Create a copy of reminders for serialization
-            reminders_copy = {}
-            
-            for reminder_id, reminder in self.reminders.items():
-                reminder_copy = dict(reminder)
-                
-                # Convert datetime objects to ISO format strings for JSON serialization
-                if isinstance(reminder_copy.get('next_time'), datetime):
-                    reminder_copy['next_time'] = reminder_copy['next_time'].isoformat()
-                
-                if isinstance(reminder_copy.get('last_taken'), datetime):
-                    reminder_copy['last_taken'] = reminder_copy['last_taken'].isoformat()
-                
-                reminders_copy[reminder_id] = reminder_copy
-            
-            with open(self.reminders_file, 'w') as f:
-                json.dump(reminders_copy, f)
-            return True
-        except Exception as e:
-            print(f"Error saving reminders: {e}")
-            return False
+        """Kept for compatibility: every change is already saved as it happens"""
+        return True
+    
+    def batch(self):
+        """Group changes into one transaction, rolled back if the block raises:
+        
+            with manager.batch():
+                for item in prescription:
+                    manager.add_reminder(...)
+        """
+        return self.repository.batch()
     
     def add_reminder(self, medication_name, dosage, frequency, duration=0, notes="", doses_taken=0):
         """Add a new medication reminder"""
         reminder_id = str(uuid.uuid4())
         now = datetime.now()
         
-        self.reminders[reminder_id] = {
+        self.repository.add_reminder({
             "id": reminder_id,
             "medication_name": medication_name,
             "dosage": dosage,
-            "frequency": frequency,
+            # Stored in canonical form ('bid' -> 'Twice daily') so every screen reads the same cadence
+            "frequency": parse_frequency(frequency).label,
             "duration": duration,
             "notes": notes,
             "created_at": now.isoformat(),
@@ -81,39 +64,50 @@ class MedicationReminder:
             "next_time": None,
             "is_active": True,
             "doses_taken": doses_taken
-        }
-        
-        self.save_reminders()
+        })
         return reminder_id
     
     def update_reminder(self, reminder_id, **kwargs):
         """Update an existing reminder with any provided fields"""
-        if reminder_id not in self.reminders:
-            return False
-        
-        # Update only the fields that are provided
-        for key, value in kwargs.items():
-            if key in self.reminders[reminder_id]:
-                self.reminders[reminder_id][key] = value
-        
-        self.save_reminders()
-        return True
+        # Convert datetime objects to ISO format strings for storage
+        fields = {
+            key: value.isoformat() if isinstance(value, datetime) else value
+            for key, value in kwargs.items()
+        }
+        if 'frequency' in fields:
+            fields['frequency'] = parse_frequency(fields['frequency']).label
+        return self.repository.update_reminder(reminder_id, **fields)
     
     def delete_reminder(self, reminder_id):
         """Delete a reminder by ID"""
-        if reminder_id in self.reminders:
-            del self.reminders[reminder_id]
-            self.save_reminders()
-            return True
-        return False
+        return self.repository.delete_reminder(reminder_id)
     
     def get_reminder(self, reminder_id):
         """Get a single reminder by ID"""
-        return self.reminders.get(reminder_id)
+        record = self.repository.get_record(reminder_id)
+        return self._to_api(record) if record is not None else None
     
     def get_active_reminders(self):
         """Get all active reminders"""
-        # Convert to list and sort by most recently created first
-        active_reminders = [r for r in self.reminders.values() if r.get('is_active', True)]
-        active_reminders.sort(key=lambda x: x.get('created_at', ''), reverse=True)
-        return active_reminders
\ No newline at end of file
+        # Already sorted by most recently created first
+        return [self._to_api(r) for r in self.repository.get_active_records()]
+    
+    def get_next_due(self, k=1, after=None):
+        """Get the k reminders due next at or after a datetime (default now)"""
+        return [self._to_api(r) for r in self.repository.get_next_due(k, after)]
+    
+    def get_due_between(self, start, end):
+        """Get reminders with a next dose between start and end (start None includes overdue)"""
+        return [self._to_api(r) for r in self.repository.get_due_between(start, end)]
+    
+    def get_doses_due_today(self):
+        """Get (reminder, dose time) for every dose still scheduled today, earliest first"""
+        return [(self._to_api(r), time) for r, time in self.repository.get_doses_due_today()]
+    
+    def get_missed_doses(self, since):
+        """Get (reminder, dose time) for every dose scheduled since a datetime and not taken"""
+        return [(self._to_api(r), time) for r, time in self.repository.get_missed_doses(since)]
+    
+    def get_adherence(self, reminder_id=None):
+        """Get the adherence summary of one reminder, or of all of them, as a dict"""
+        return self.repository.get_adherence(reminder_id).to_dict()
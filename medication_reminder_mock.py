@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
+import copy
 import json
 import os
+from contextlib import contextmanager
 import uuid
 from datetime import datetime, timedelta
 
@@ -11,6 +13,7 @@ class MockMedicationReminder:
     def __init__(self):
         self.reminders = {}
         self.reminders_file = "reminders_mock.json"
+        self._batch_depth = 0
         self.load_reminders()
     
     def load_reminders(self):
@@ -26,9 +29,27 @@ class MockMedicationReminder:
     
     def save_reminders(self):
         """Save reminders to file"""
+        if self._batch_depth:
+            # Written once when the batch ends
+            return
         with open(self.reminders_file, 'w') as f:
             json.dump(self.reminders, f)
     
+    @contextmanager
+    def batch(self):
+        """Same contract as MedicationReminder.batch: one save, rollback on error"""
+        saved = copy.deepcopy(self.reminders)
+        self._batch_depth += 1
+        try:
+            yield
+        except BaseException:
+            self.reminders = saved
+            raise
+        finally:
+            self._batch_depth -= 1
+        if not self._batch_depth:
+            self.save_reminders()
+    
     def add_reminder(self, medication_name, dosage, frequency, duration, notes=""):
         """Add a new reminder"""
         reminder_id = str(uuid.uuid4())
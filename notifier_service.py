@@ -0,0 +1,159 @@
+"""
+Headless dose notifier: reminds the patient while the app's UI is closed.
+
+Runs without Kivy. It reads the reminder store through ReminderRepository,
+sleeps until the next scheduled dose, shows one notification for
+everything due at that moment and re-arms. Changes the app makes (a dose
+taken, a reminder edited) reach it through the repository's file watcher
+and re-arm it at once, so it never polls the store.
+
+Usage: python notifier_service.py [--user USERNAME]
+On Android, start it as a background service running main().
+"""
+import argparse
+import threading
+from datetime import datetime, timedelta
+from reminder_repository import ReminderRepository
+from user_session import UserSession
+
+# Optional: native notifications; without plyer they are printed instead
+try:
+    from plyer import notification as plyer_notification
+except ImportError:
+    plyer_notification = None
+
+APP_NAME = 'Medicine Assistant'
+
+# Doses that became due this long before the service started are still announced
+STARTUP_GRACE = timedelta(minutes=15)
+
+# Longest single sleep; waking now and then re-reads the wall clock, which
+# may have been changed (time zone, daylight saving) or advanced in deep sleep
+MAX_SLEEP = timedelta(minutes=30)
+
+class PlyerBackend:
+    """Native notifications through plyer"""
+
+    def notify(self, title, message):
+        plyer_notification.notify(title=title, message=message, app_name=APP_NAME, timeout=10)
+
+class ConsoleBackend:
+    """Prints notifications, for desktops without plyer and for testing"""
+
+    def notify(self, title, message):
+        print(f"[{datetime.now():%H:%M}] {title}: {message}")
+
+def default_backend():
+    return PlyerBackend() if plyer_notification is not None else ConsoleBackend()
+
+def notify_missed(missed, backend=None):
+    """Show one summary notification for reconcile_missed_doses() results.
+
+    missed is a list of (record, missed count); nothing is shown when it is empty.
+    """
+    if not missed:
+        return
+    total = sum(count for _, count in missed)
+    title = f"You missed {total} dose{'s' if total != 1 else ''}"
+    if len(missed) == 1:
+        message = f"{missed[0][0].medication_name} is due again now"
+    else:
+        names = [record.medication_name for record, _ in missed]
+        shown = ", ".join(names[:3]) + (f" and {len(names) - 3} more" if len(names) > 3 else "")
+        message = f"{len(names)} medications: {shown}"
+    try:
+        (backend or default_backend()).notify(title, message)
+    except Exception as e:
+        print(f"Failed to show notification: {e}")
+
+class NotifierService:
+    """
+    Sleeps until the next dose is due, notifies and re-arms.
+
+    backend is any object with notify(title, message). Each reminder is
+    announced once per scheduled next_time: taking the dose (which moves
+    next_time) is what arms its next notification.
+    """
+
+    def __init__(self, backend=None, repository=None):
+        self.backend = backend or default_backend()
+        self.repository = repository or ReminderRepository()
+        self._wakeup = threading.Event()
+        self._stopped = False
+        self._announced = {}  # reminder_id -> next_time already notified
+        self._since = datetime.now() - STARTUP_GRACE
+
+    def run(self):
+        """Notify until stop() is called"""
+        self.repository.subscribe(self._on_change)
+        try:
+            while not self._stopped:
+                self._notify_due()
+                self._wakeup.wait(self._sleep_seconds())
+                self._wakeup.clear()
+        finally:
+            self.repository.unsubscribe(self._on_change)
+
+    def stop(self):
+        self._stopped = True
+        self._wakeup.set()
+
+    def _on_change(self, action, reminder_id):
+        # Runs on the file watcher thread: just re-arm the main loop
+        if action == 'deleted':
+            self._announced.pop(reminder_id, None)
+        self._wakeup.set()
+
+    def _notify_due(self):
+        """Announce every dose due since the last check that wasn't announced yet"""
+        now = datetime.now()
+        due = [
+            record for record in self.repository.get_due_between(self._since, now + timedelta(seconds=1))
+            if record.is_active and not record.is_completed
+            and self._announced.get(record.id) != record.next_time
+        ]
+        # Everything due up to now has been looked at
+        self._since = now
+        if not due:
+            return
+        for record in due:
+            self._announced[record.id] = record.next_time
+        if len(due) == 1:
+            record = due[0]
+            title = f"Time to take {record.medication_name}"
+            message = f"It's time to take your {record.dosage} of {record.medication_name}"
+        else:
+            title = f"Time to take {len(due)} medications"
+            message = ", ".join(f"{record.medication_name} {record.dosage}".strip() for record in due)
+        try:
+            self.backend.notify(title, message)
+        except Exception as e:
+            print(f"Failed to show notification: {e}")
+
+    def _sleep_seconds(self):
+        """Seconds until the next not yet announced dose (capped at MAX_SLEEP)"""
+        now = datetime.now()
+        # Doses in the next second were just announced along with the due ones
+        for record in self.repository.get_due_between(now + timedelta(seconds=1), now + MAX_SLEEP):
+            if self._announced.get(record.id) != record.next_time:
+                return max((record.next_time_dt - now).total_seconds(), 0)
+        return MAX_SLEEP.total_seconds()
+
+def main():
+    parser = argparse.ArgumentParser(description="Show medication reminders without the app's UI")
+    parser.add_argument('--user', help="whose reminders to watch (required once reminders are stored per user)")
+    args = parser.parse_args()
+    if args.user:
+        UserSession().login(args.user)
+    elif UserSession().shared_data_adopted():
+        parser.error("reminders are stored per user; pass --user USERNAME")
+    service = NotifierService()
+    try:
+        service.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        ReminderRepository.close_instance()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+import atexit
+import copy
+import os
+import threading
+import time
+import codec
+from file_lock import file_lock
+
+class WriteBehindWriter:
+    """
+    Background writer shared by every data file the app saves.
+    Implemented as a singleton so all screens feed the same writer thread.
+
+    write() returns immediately: the data is shallow-copied, queued per file
+    and written by a worker thread after a short quiet period, so a burst of
+    saves to the same file becomes a single write. Each write goes to a temp
+    file that is fsynced and then atomically renamed over the target, so a
+    crash can never leave a truncated file behind.
+
+    Files shared with other processes can pass a merge function: the writer
+    then takes the file's advisory lock, re-reads what is on disk, and writes
+    merge(on_disk, data) instead of data, so another process's changes made
+    since this one loaded the file are kept rather than overwritten.
+    """
+    _instance = None
+
+    def __new__(cls, delay=0.5):
+        if cls._instance is None:
+            cls._instance = super(WriteBehindWriter, cls).__new__(cls)
+            cls._instance.delay = delay
+            cls._instance._pending = {}  # path -> (data, indent, merge, callbacks)
+            cls._instance._condition = threading.Condition()
+            cls._instance._writing = 0
+            cls._instance._thread = threading.Thread(target=cls._instance._run, daemon=True)
+            cls._instance._thread.start()
+            # Don't lose queued writes when a script or the app exits
+            atexit.register(cls._instance.flush)
+        return cls._instance
+
+    def write(self, path, data, indent=None, callback=None, merge=None):
+        """Queue data to be saved at path with the current codec (see codec.py).
+
+        callback(path, error) runs on the writer thread once the file is
+        written; error is None on success. merge(on_disk, data), if given,
+        returns what to write given the file's current contents (None when
+        it doesn't exist yet).
+        """
+        snapshot = copy.copy(data)
+        with self._condition:
+            callbacks = []
+            if path in self._pending:
+                # A newer save replaces the queued one; both callers get notified
+                callbacks = self._pending[path][3]
+            if callback is not None:
+                callbacks.append(callback)
+            self._pending[path] = (snapshot, indent, merge, callbacks)
+            self._condition.notify_all()
+
+    def flush(self, timeout=10):
+        """Block until every queued write has reached disk"""
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            self._condition.notify_all()
+            while self._pending or self._writing:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending:
+                    self._condition.wait()
+            # Let a burst of saves settle before writing
+            time.sleep(self.delay)
+            with self._condition:
+                pending, self._pending = self._pending, {}
+                self._writing = len(pending)
+            for path, (data, indent, merge, callbacks) in pending.items():
+                error = None
+                try:
+                    if merge is None:
+                        write_atomic(path, codec.dumps(data, indent=indent))
+                    else:
+                        write_merged(path, data, merge, indent=indent)
+                except Exception as e:
+                    error = e
+                    print(f"Error saving {path}: {e}")
+                for callback in callbacks:
+                    try:
+                        callback(path, error)
+                    except Exception as e:
+                        print(f"Error in save callback for {path}: {e}")
+                with self._condition:
+                    self._writing -= 1
+                    self._condition.notify_all()
+
+def write_merged(path, data, merge, indent=None):
+    """Read-merge-write path under its advisory lock; the lock is held only for this"""
+    with file_lock(path):
+        on_disk = None
+        if os.path.exists(path):
+            try:
+                on_disk = codec.load_file(path)
+            except Exception as e:
+                print(f"Error reading {path} before merging; overwriting it: {e}")
+        write_atomic(path, codec.dumps(merge(on_disk, data), indent=indent))
+
+def write_atomic(path, raw):
+    """Replace path with raw bytes via a fsynced temp file and an atomic rename"""
+    directory = os.path.dirname(os.path.abspath(path))
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(raw)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    # Persist the rename itself where the platform allows opening directories
+    try:
+        dir_fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(dir_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_fd)
@@ -0,0 +1,96 @@
+from operator import attrgetter
+
+_set = object.__setattr__
+
+class Record:
+    """
+    Base for small immutable records kept in memory in large numbers.
+
+    Subclasses list their fields in FIELDS and use them as __slots__, so a
+    record carries no per-instance dict. Records can't be changed after
+    they are built: replace() returns a changed copy instead. That makes
+    them safe to share between the repository, widgets and writer threads
+    without defensive copies, and copy.copy/deepcopy simply return the
+    record itself. get/[]/in work as on the dicts they replace.
+    """
+    __slots__ = ()
+    FIELDS = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # One C-level call fetches every field (as a tuple: FIELDS needs two or more)
+        cls._values = attrgetter(*cls.FIELDS)
+        cls._field_set = frozenset(cls.FIELDS)
+
+    def __init__(self, data):
+        for field in self.FIELDS:
+            _set(self, field, data.get(field))
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data)
+
+    def to_dict(self):
+        """Return a new plain dict of the fields"""
+        return dict(zip(self.FIELDS, self._values(self)))
+
+    def replace(self, **fields):
+        """Return a copy with some fields changed"""
+        unknown = fields.keys() - self._field_set
+        if unknown:
+            raise KeyError(', '.join(sorted(unknown)))
+        data = self.to_dict()
+        data.update(fields)
+        return self.__class__(data)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{self.__class__.__name__} is immutable; use replace()")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{self.__class__.__name__} is immutable")
+
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self._values(self) == other._values(other)
+
+    __hash__ = None
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return (self.__class__, (self.to_dict(),))
+
+    # Dict-style access for code written against the old dicts
+    def get(self, key, default=None):
+        if key in self._field_set:
+            return getattr(self, key)
+        return default
+
+    def __getitem__(self, key):
+        if key not in self._field_set:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key):
+        return key in self._field_set
+
+    def keys(self):
+        return self.FIELDS
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.to_dict()!r})"
+
+class DoseEvent(Record):
+    """One taken/skipped/snoozed dose, as appended to the dose journal"""
+    FIELDS = ('id', 'reminder_id', 'event', 'time', 'next_time')
+    __slots__ = FIELDS
+
+class ChatPost(Record):
+    """One message of the home screen chat feed"""
+    FIELDS = ('id', 'username', 'message', 'image', 'timestamp')
+    __slots__ = FIELDS
@@ -0,0 +1,272 @@
+"""
+Bulk import and export of medication regimens.
+
+CSV (e.g. a pharmacy's regimen list) and iCalendar files are parsed one row
+or event at a time and written to the repository in batches, each batch in
+one transaction (see ReminderRepository.batch), so a 50k-row file never sits
+in memory and a bad batch leaves nothing half-imported. Export writes one
+recurring VEVENT per course straight to the output file.
+"""
+import csv
+import math
+import re
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from frequency import parse_frequency
+from reminder_repository import ReminderRepository
+
+# Rows written per transaction
+IMPORT_BATCH_SIZE = 500
+
+# Accepted CSV header names for each reminder field (compared lowercased)
+CSV_COLUMNS = {
+    'medication_name': ('medication_name', 'medication', 'drug', 'name'),
+    'dosage': ('dosage', 'dose', 'strength'),
+    'frequency': ('frequency', 'freq'),
+    'duration': ('duration', 'days', 'duration_days'),
+    'notes': ('notes', 'instructions', 'sig')
+}
+
+# iCalendar properties carrying the reminder fields the standard has no place for
+ICS_DOSAGE = 'X-MEDREMINDER-DOSAGE'
+ICS_FREQUENCY = 'X-MEDREMINDER-FREQUENCY'
+ICS_DURATION = 'X-MEDREMINDER-DURATION'
+ICS_PRODID = '-//Mobile_App//Medication Reminder//EN'
+
+@contextmanager
+def _open(path_or_file, mode):
+    """Use an open file object as is, or open a path (closing it afterwards)"""
+    if hasattr(path_or_file, 'read' if 'r' in mode else 'write'):
+        yield path_or_file
+    else:
+        with open(path_or_file, mode, newline='', encoding='utf-8') as f:
+            yield f
+
+def _repository(repository):
+    return repository if repository is not None else ReminderRepository()
+
+def make_reminder(medication_name, dosage='', frequency='Once daily', duration=1, notes=''):
+    """Build a new reminder dict from imported values, or None if it has no medication"""
+    medication_name = (medication_name or '').strip()
+    if not medication_name:
+        return None
+    try:
+        duration = max(int(float(duration or 1)), 1)
+    except (ValueError, TypeError, OverflowError):
+        # 'one week', 'nan', 'inf': fall back to a single day
+        duration = 1
+    return {
+        'id': str(uuid.uuid4()),
+        'medication_name': medication_name,
+        'dosage': (dosage or '').strip(),
+        'frequency': parse_frequency(frequency).label,
+        'duration': duration,
+        'notes': (notes or '').strip(),
+        'doses_taken': 0,
+        'next_time': None,
+        'created_at': datetime.now().isoformat(),
+        'is_active': True
+    }
+
+def import_reminders(reminders, repository=None, batch_size=IMPORT_BATCH_SIZE):
+    """Add reminder dicts from any iterable (None entries are skipped) in batches.
+
+    Returns (imported, skipped). A batch that fails is rolled back as a whole
+    and counted as skipped; later batches are still imported.
+    """
+    repository = _repository(repository)
+    imported = skipped = 0
+    chunk = []
+
+    def flush():
+        nonlocal imported, skipped
+        try:
+            with repository.batch():
+                for reminder in chunk:
+                    repository.add_reminder(reminder)
+            imported += len(chunk)
+        except Exception as e:
+            print(f"Error importing {len(chunk)} reminders, batch rolled back: {e}")
+            skipped += len(chunk)
+        chunk.clear()
+
+    for reminder in reminders:
+        if reminder is None:
+            skipped += 1
+            continue
+        chunk.append(reminder)
+        if len(chunk) >= batch_size:
+            flush()
+    if chunk:
+        flush()
+    return imported, skipped
+
+def read_csv(path_or_file):
+    """Yield a reminder dict (or None for an unusable row) per CSV row"""
+    with _open(path_or_file, 'r') as f:
+        reader = csv.DictReader(f)
+        headers = {(name or '').strip().lower(): name for name in reader.fieldnames or ()}
+        columns = {}
+        for field, aliases in CSV_COLUMNS.items():
+            for alias in aliases:
+                if alias in headers:
+                    columns[field] = headers[alias]
+                    break
+        if 'medication_name' not in columns:
+            raise ValueError(f"CSV needs a medication column, found: {', '.join(headers)}")
+        for row in reader:
+            yield make_reminder(**{field: row.get(column) for field, column in columns.items()})
+
+def import_csv(path_or_file, repository=None, batch_size=IMPORT_BATCH_SIZE):
+    """Import a regimen CSV; returns (imported, skipped)"""
+    return import_reminders(read_csv(path_or_file), repository, batch_size)
+
+def _unfold(lines):
+    """Join iCalendar continuation lines (starting with a space or tab) to their line"""
+    current = None
+    for line in lines:
+        line = line.rstrip('\r\n')
+        if line[:1] in (' ', '\t') and current is not None:
+            current += line[1:]
+            continue
+        if current is not None:
+            yield current
+        current = line
+    if current is not None:
+        yield current
+
+# Escaped iCalendar text characters and what they stand for
+_ESCAPED = {'n': '\n', 'N': '\n', ',': ',', ';': ';', '\\': '\\'}
+_ESCAPE_SEQUENCE = re.compile(r'\\(.)')
+
+def _unescape(value):
+    # One left-to-right pass, so an escaped backslash before 'n' stays a backslash
+    return _ESCAPE_SEQUENCE.sub(lambda match: _ESCAPED.get(match.group(1), match.group(1)), value)
+
+def _escape(value):
+    return (value.replace('\\', '\\\\').replace(';', '\\;')
+            .replace(',', '\\,').replace('\n', '\\n'))
+
+def _parse_rrule(rrule):
+    return dict(part.split('=', 1) for part in rrule.split(';') if '=' in part)
+
+def _event_to_reminder(event):
+    """Map one VEVENT's properties to a reminder dict, or None if they can't be read"""
+    try:
+        return _read_event(event)
+    except (ValueError, ZeroDivisionError, OverflowError) as e:
+        print(f"Skipping unreadable event {event.get('SUMMARY', '')!r}: {e}")
+        return None
+
+def _read_event(event):
+    frequency = _unescape(event.get(ICS_FREQUENCY, ''))
+    duration = event.get(ICS_DURATION)
+    rule = _parse_rrule(event.get('RRULE', ''))
+    if not frequency and rule:
+        interval = int(rule.get('INTERVAL', 1) or 1)
+        if rule.get('FREQ') == 'HOURLY':
+            frequency = f"Every {interval} hours"
+        elif rule.get('FREQ') == 'MINUTELY' and (24 * 60) % interval == 0:
+            frequency = f"{24 * 60 // interval} times daily"
+        else:
+            frequency = 'Once daily'
+    if not duration and rule.get('COUNT'):
+        duration = math.ceil(int(rule['COUNT']) / parse_frequency(frequency).doses_per_day)
+    name = _unescape(event.get('SUMMARY', ''))
+    dosage = _unescape(event.get(ICS_DOSAGE, ''))
+    # Our own exports put the dosage after the name in SUMMARY
+    if dosage and name.endswith(' ' + dosage):
+        name = name[:-len(dosage) - 1]
+    return make_reminder(
+        medication_name=name,
+        dosage=dosage,
+        frequency=frequency,
+        duration=duration,
+        notes=_unescape(event.get('DESCRIPTION', ''))
+    )
+
+def read_ics(path_or_file):
+    """Yield a reminder dict (or None) per VEVENT, reading the file line by line"""
+    with _open(path_or_file, 'r') as f:
+        event = None
+        for line in _unfold(f):
+            if line == 'BEGIN:VEVENT':
+                event = {}
+            elif line == 'END:VEVENT':
+                if event is not None:
+                    yield _event_to_reminder(event)
+                event = None
+            elif event is not None and ':' in line:
+                name, value = line.split(':', 1)
+                # Drop parameters such as DTSTART;TZID=...
+                event[name.split(';', 1)[0].upper()] = value
+
+def import_ics(path_or_file, repository=None, batch_size=IMPORT_BATCH_SIZE):
+    """Import the events of an iCalendar file as reminders; returns (imported, skipped)"""
+    return import_reminders(read_ics(path_or_file), repository, batch_size)
+
+def _fold(line):
+    """Split a content line into 75-octet pieces as iCalendar requires"""
+    raw = line.encode('utf-8')
+    if len(raw) <= 75:
+        return line + '\r\n'
+    pieces = []
+    while raw:
+        size = 75 if not pieces else 74
+        # Never cut a multi-byte character in half
+        while size < len(raw) and (raw[size] & 0xC0) == 0x80:
+            size -= 1
+        pieces.append(raw[:size].decode('utf-8'))
+        raw = raw[size:]
+    return '\r\n '.join(pieces) + '\r\n'
+
+def _ics_time(value):
+    return value.strftime('%Y%m%dT%H%M%S')
+
+def reminder_to_vevent(record, now=None):
+    """Return the VEVENT lines for one course's remaining doses, or [] if none remain"""
+    remaining = record.doses_remaining
+    if remaining <= 0 or not record.is_active:
+        return []
+    now = now or datetime.now()
+    start = record.next_time_dt or now
+    summary = f"{record.medication_name} {record.dosage}".strip()
+    interval = parse_frequency(record.frequency).interval_minutes
+    if interval % 60:
+        rule = f"FREQ=MINUTELY;INTERVAL={interval}"
+    else:
+        rule = f"FREQ=HOURLY;INTERVAL={interval // 60}"
+    lines = [
+        'BEGIN:VEVENT',
+        f"UID:{record.id}@medication-reminder",
+        f"DTSTAMP:{_ics_time(now)}",
+        f"DTSTART:{_ics_time(start)}",
+        f"DTEND:{_ics_time(start + timedelta(minutes=15))}",
+        f"RRULE:{rule};COUNT={remaining}",
+        f"SUMMARY:{_escape(summary)}",
+        f"{ICS_DOSAGE}:{_escape(record.dosage or '')}",
+        f"{ICS_FREQUENCY}:{_escape(record.frequency or '')}",
+        f"{ICS_DURATION}:{record.duration}",
+    ]
+    if record.notes:
+        lines.append(f"DESCRIPTION:{_escape(record.notes)}")
+    lines.append('END:VEVENT')
+    return lines
+
+def export_ics(path_or_file, records=None, repository=None):
+    """Write every remaining course as a recurring VEVENT; returns the event count"""
+    if records is None:
+        records = _repository(repository).get_active_records()
+    now = datetime.now()
+    count = 0
+    with _open(path_or_file, 'w') as f:
+        f.write('BEGIN:VCALENDAR\r\nVERSION:2.0\r\n')
+        f.write(f'PRODID:{ICS_PRODID}\r\nCALSCALE:GREGORIAN\r\n')
+        for record in records:
+            lines = reminder_to_vevent(record, now)
+            if lines:
+                f.writelines(_fold(line) for line in lines)
+                count += 1
+        f.write('END:VCALENDAR\r\n')
+    return count
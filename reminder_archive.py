@@ -0,0 +1,123 @@
+import gzip
+import json
+import os
+from datetime import datetime
+import codec
+from persistence import write_atomic
+
+class ReminderArchive:
+    """
+    Cold storage for finished medication courses.
+
+    Each archived reminder is one JSON line, together with its dose history,
+    in a gzip file named after the month the course ended
+    (e.g. archive/2025-06.jsonl.gz). Every archive run appends a new gzip
+    member, which gzip reads back as one stream. A small index.json keeps one
+    summary per course, so the history view can list courses without
+    opening any archive file; a month's file is only decompressed when one of
+    its courses is opened.
+    """
+
+    def __init__(self, directory='archive'):
+        self.directory = directory
+        self.index_path = os.path.join(directory, 'index.json')
+        self._index = None
+
+    def summaries(self):
+        """Return the course summaries, most recently completed first"""
+        if self._index is None:
+            self._index = self._load_index()
+        return sorted(self._index.values(), key=lambda s: s['completed_at'] or '', reverse=True)
+
+    def __contains__(self, reminder_id):
+        if self._index is None:
+            self._index = self._load_index()
+        return reminder_id in self._index
+
+    def _load_index(self):
+        if not os.path.exists(self.index_path):
+            return {}
+        try:
+            return {summary['id']: summary for summary in codec.load_file(self.index_path)}
+        except Exception as e:
+            print(f"Error loading archive index {self.index_path}: {e}")
+            return {}
+
+    def archive(self, courses):
+        """Append (reminder, dose_events) pairs to their month files and the index.
+
+        Returns the ids that are safely archived, including ids archived by
+        an earlier run that was interrupted before removing them from the
+        active store; only those should be deleted from it.
+        """
+        if self._index is None:
+            self._index = self._load_index()
+        archived = []
+        by_file = {}
+        for reminder, events in courses:
+            if reminder['id'] in self._index:
+                archived.append(reminder['id'])
+                continue
+            completed_at = reminder.get('last_taken') or datetime.now().isoformat()
+            filename = f"{completed_at[:7]}.jsonl.gz"
+            by_file.setdefault(filename, []).append((reminder, events, completed_at))
+        if not by_file:
+            return archived
+
+        os.makedirs(self.directory, exist_ok=True)
+        summaries = []
+        for filename, entries in by_file.items():
+            path = os.path.join(self.directory, filename)
+            with open(path, 'ab') as raw:
+                with gzip.GzipFile(fileobj=raw, mode='wb') as f:
+                    for reminder, events, completed_at in entries:
+                        line = json.dumps(dict(reminder, dose_events=events)) + '\n'
+                        f.write(line.encode('utf-8'))
+                raw.flush()
+                os.fsync(raw.fileno())
+            for reminder, events, completed_at in entries:
+                summaries.append({
+                    'id': reminder['id'],
+                    'medication_name': reminder.get('medication_name', ''),
+                    'dosage': reminder.get('dosage', ''),
+                    'frequency': reminder.get('frequency', ''),
+                    'doses_taken': reminder.get('doses_taken', 0),
+                    'created_at': reminder.get('created_at'),
+                    'completed_at': completed_at,
+                    'file': filename
+                })
+
+        # The index is written last: a course is only listed once its file is on disk
+        index = dict(self._index)
+        index.update((summary['id'], summary) for summary in summaries)
+        write_atomic(self.index_path, codec.dumps(list(index.values())))
+        self._index = index
+        return archived + [summary['id'] for summary in summaries]
+
+    def iter_courses(self, filename):
+        """Yield the archived reminders (with 'dose_events') of one month file"""
+        path = os.path.join(self.directory, filename)
+        if not os.path.exists(path):
+            return
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        print(f"Skipping damaged archive line in {path}")
+        except (EOFError, OSError) as e:
+            # A member cut short by a crash mid-archive; earlier members are intact
+            print(f"Stopped reading damaged archive {path}: {e}")
+
+    def get_course(self, reminder_id):
+        """Return one archived reminder with its dose history, or None"""
+        if self._index is None:
+            self._index = self._load_index()
+        summary = self._index.get(reminder_id)
+        if summary is None:
+            return None
+        for course in self.iter_courses(summary['file']):
+            if course['id'] == reminder_id:
+                return course
+        return None
@@ -0,0 +1,138 @@
+from datetime import datetime
+from frequency import parse_frequency
+from records import Record
+from reminder_store import REMINDER_COLUMNS
+
+# Version written with every new record; older rows are migrated when loaded
+RECORD_SCHEMA_VERSION = 1
+
+# from_version -> function(dict) returning the dict at from_version + 1
+MIGRATIONS = {}
+
+def migration(from_version):
+    """Register a function that upgrades a record dict from one schema version"""
+    def register(func):
+        MIGRATIONS[from_version] = func
+        return func
+    return register
+
+@migration(0)
+def _add_defaults(data):
+    """Version 0 rows were imported from reminders.json or medication_reminders.json,
+    which used different fields; fill what either of them could leave out."""
+    data['duration'] = max(int(data.get('duration') or 1), 1)
+    data['doses_taken'] = int(data.get('doses_taken') or 0)
+    data['notes'] = data.get('notes') or ''
+    if data.get('is_active') is None:
+        data['is_active'] = True
+    return data
+
+def migrate(data):
+    """Bring a record dict up to RECORD_SCHEMA_VERSION; returns (data, changed)"""
+    version = data.get('schema_version') or 0
+    if version >= RECORD_SCHEMA_VERSION:
+        return data, False
+    data = dict(data)
+    while version < RECORD_SCHEMA_VERSION:
+        data = MIGRATIONS[version](data)
+        version += 1
+    data['schema_version'] = version
+    return data, True
+
+def total_doses(reminder):
+    """Number of doses in the whole course of a reminder dict or record"""
+    return parse_frequency(reminder.get('frequency')).total_doses(reminder.get('duration'))
+
+def _parse_timestamp(value):
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except (ValueError, TypeError):
+        return None
+
+# Columns holding ISO timestamps, mapped to the slot caching the parsed datetime
+_TIMESTAMP_CACHES = {
+    'next_time': '_next_time_dt',
+    'last_taken': '_last_taken_dt',
+    'created_at': '_created_at_dt'
+}
+
+_UNPARSED = object()
+_set = object.__setattr__
+
+class ReminderRecord(Record):
+    """
+    Compact, immutable in-memory form of one reminder.
+
+    Uses __slots__ instead of a per-record dict, and parses each timestamp
+    column at most once, on first access. Changes go through replace(),
+    which keeps the parsed timestamps of the columns it doesn't touch.
+    Supports get/[] so code written for reminder dicts reads records
+    unchanged.
+    """
+    FIELDS = REMINDER_COLUMNS
+    __slots__ = REMINDER_COLUMNS + tuple(_TIMESTAMP_CACHES.values()) + ('migrated',)
+
+    def __init__(self, data, migrated=False):
+        for column in REMINDER_COLUMNS:
+            _set(self, column, data.get(column))
+        for cache in _TIMESTAMP_CACHES.values():
+            _set(self, cache, _UNPARSED)
+        # Migrated values are only written back with the record's next update
+        _set(self, 'migrated', migrated)
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a record, migrating older schema versions on the way in"""
+        data, changed = migrate(data)
+        return cls(data, migrated=changed)
+
+    def replace(self, migrated=None, **fields):
+        """Return a copy with some columns (and optionally the migrated flag) changed"""
+        record = super().replace(**fields)
+        _set(record, 'migrated', self.migrated if migrated is None else migrated)
+        for column, cache in _TIMESTAMP_CACHES.items():
+            if column not in fields:
+                _set(record, cache, getattr(self, cache))
+        return record
+
+    def __reduce__(self):
+        return (self.__class__, (self.to_dict(), self.migrated))
+
+    def _timestamp(self, column):
+        cache = _TIMESTAMP_CACHES[column]
+        value = getattr(self, cache)
+        if value is _UNPARSED:
+            value = _parse_timestamp(getattr(self, column))
+            _set(self, cache, value)
+        return value
+
+    @property
+    def next_time_dt(self):
+        return self._timestamp('next_time')
+
+    @property
+    def last_taken_dt(self):
+        return self._timestamp('last_taken')
+
+    @property
+    def created_at_dt(self):
+        return self._timestamp('created_at')
+
+    @property
+    def total_doses(self):
+        return total_doses(self)
+
+    @property
+    def doses_remaining(self):
+        """Doses of the course still ahead; missed doses use up the course too"""
+        return max(self.total_doses - (self.doses_taken or 0) - (self.doses_missed or 0), 0)
+
+    @property
+    def is_completed(self):
+        """True once every dose of the course has been taken or missed"""
+        return self.doses_remaining == 0
+
+    def __repr__(self):
+        return f"ReminderRecord({self.id!r}, {self.medication_name!r})"
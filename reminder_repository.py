@@ -0,0 +1,573 @@
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from due_index import DueIndex
+from file_lock import file_lock
+from file_watcher import FileWatcher
+from dose_timeline import DoseTimeline, find_missed_doses
+from adherence import USER_SCOPE
+from dose_journal import DoseJournal, apply_dose_event, dose_counts, with_dose_event
+from reminder_archive import ReminderArchive
+from records import DoseEvent
+from reminder_record import ReminderRecord, RECORD_SCHEMA_VERSION
+from reminder_store import ReminderStore, ReminderSnapshot, UpdateConflict, REMINDER_COLUMNS, DOSE_COLUMNS
+from user_session import UserSession
+
+# Compact the dose journal into SQLite after this many new events
+COMPACT_THRESHOLD = 50
+
+# Completed courses stay on the Reminder screen this long after the last dose
+ARCHIVE_AFTER = timedelta(days=1)
+
+def coalesce_notifications(notifications):
+    """Reduce a batch's (action, reminder_id) list to one notification per reminder"""
+    first, last = {}, {}
+    for action, reminder_id in notifications:
+        first.setdefault(reminder_id, action)
+        last[reminder_id] = action
+    coalesced = []
+    for reminder_id, action in last.items():
+        if first[reminder_id] == 'added':
+            if action == 'deleted':
+                # Created and removed within the batch: nobody ever saw it
+                continue
+            action = 'added'
+        coalesced.append((action, reminder_id))
+    return coalesced
+
+class ReminderRepository:
+    """
+    The single source of reminders for the whole app.
+    Implemented as a singleton so the Reminder screen, MedicationReminder and
+    the AI assistant all share one in-memory cache of the ReminderStore.
+
+    Reads come from memory; writes go through to SQLite one row at a time and
+    then notify subscribers, so a reminder created anywhere (e.g. by the AI
+    assistant) shows up on the Reminder screen.
+
+    Doses are not written to the reminder rows directly: record_dose appends
+    to the DoseJournal and replays the event onto the cache. The journal is
+    compacted into SQLite in the background once it grows, at startup and
+    when the app stops.
+
+    Two DueIndex instances keep reminder ids ordered by next dose time and by
+    creation time. Every change moves only the reminder it touched, so the
+    ordered reads below and the next-due queries never re-sort the cache.
+
+    Completed courses are moved to the user's ReminderArchive when the
+    repository opens, keeping the cache down to courses still in progress.
+
+    Data is partitioned per user: the store and journal are opened in the
+    logged-in user's directory (see UserSession) on first use, and
+    close_instance() closes them again at logout.
+
+    The database and journal files are watched with FileWatcher. When another
+    process (a second copy of the app, a sync tool) changes them, the rows
+    are re-read and compared with the cache, and subscribers only hear about
+    the reminders that actually changed. The repository's own writes are
+    acknowledged to the watcher and never trigger a re-read.
+
+    Every read and write holds the repository lock: refresh_from_disk
+    changes the cache and indexes in place on the watcher thread.
+
+    Subscribers are plain callables taking (action, reminder_id) where action
+    is 'added', 'updated' or 'deleted'. They run on the thread that made the
+    change, so UI code should hop to the main loop with Clock if needed.
+    """
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __new__(cls):
+        # Screens create the repository on a background loading thread
+        with cls._instance_lock:
+            if cls._instance is None:
+                instance = super(ReminderRepository, cls).__new__(cls)
+                session = UserSession()
+                instance.store = ReminderStore(
+                    db_file=session.path('reminders.db'),
+                    legacy_file=session.path('reminders.json'),
+                    legacy_medication_file=session.path('medication_reminders.json')
+                )
+                instance.journal = DoseJournal(session.path('dose_journal.jsonl'))
+                instance.archive = ReminderArchive(session.path('archive'))
+                instance._subscribers = []
+                instance._compaction_lock = threading.Lock()
+                instance._compaction_thread = None
+                # Serialises changes with reloads triggered by the file watcher
+                instance._lock = threading.RLock()
+                instance._batched = None  # notifications held back by batch()
+                instance._undo = instance._batch_doses = None
+                # Expanded lazily, on the first dose-level query
+                instance._timeline = DoseTimeline()
+                instance.reload()
+                instance.archive_completed()
+                instance._watched_paths = (
+                    instance.store.db_file, f"{instance.store.db_file}-wal", instance.journal.path
+                )
+                for path in instance._watched_paths:
+                    FileWatcher().watch(path, instance._on_file_changed)
+                cls._instance = instance
+        return cls._instance
+
+    @classmethod
+    def close_instance(cls):
+        """Fold in the journal and close the open user's files, e.g. at logout"""
+        with cls._instance_lock:
+            instance, cls._instance = cls._instance, None
+        if instance is None:
+            return
+        for path in instance._watched_paths:
+            FileWatcher().unwatch(path, instance._on_file_changed)
+        # Waits for a running background compaction, which holds the same lock
+        instance.compact()
+        instance.journal.close()
+        ReminderStore.close_instance()
+
+    def reload(self):
+        """Refill the cache from the store after folding in the dose journal"""
+        with self._lock:
+            self.compact()
+            cache = {r['id']: ReminderRecord.from_dict(r) for r in self.store.get_reminders()}
+            due_index = DueIndex((record.id, record.next_time_dt) for record in cache.values())
+            created_index = DueIndex((record.id, record.created_at_dt) for record in cache.values())
+            # Swap in the new cache and indexes together so readers never see them half-built
+            self._cache, self._due_index, self._created_index = cache, due_index, created_index
+
+    @contextmanager
+    def _writing(self):
+        """Hold the lock for a change, then tell the watcher the writes were ours"""
+        with self._lock:
+            if self._batched is not None:
+                # batch() acknowledges once, after its commit
+                yield
+                return
+            try:
+                yield
+            finally:
+                self._acknowledge_writes()
+
+    @contextmanager
+    def batch(self):
+        """Apply many changes as one: with repository.batch(): ...
+
+        Every add/update/delete inside the block goes into a single SQLite
+        transaction. Subscribers hear about each changed reminder once, after
+        the commit. If the block raises, the transaction is rolled back, the
+        cache is restored and nobody is notified. Doses recorded inside a
+        batch go to the journal at once and are not rolled back.
+        """
+        with self._lock:
+            if self._batched is not None:
+                # Nested batches join the outer one
+                yield
+                return
+            self._batched = []
+            # Pre-batch state of each reminder the batch touches, and its doses
+            self._undo, self._batch_doses = {}, []
+            try:
+                with self.store.batch():
+                    yield
+            except BaseException:
+                self._rollback()
+                raise
+            finally:
+                batched, self._batched = self._batched, None
+                self._undo = self._batch_doses = None
+                self._acknowledge_writes()
+            for action, reminder_id in coalesce_notifications(batched):
+                self._notify(action, reminder_id)
+
+    def _remember(self, reminder_id):
+        """Inside batch(), keep a reminder's state from before its first change"""
+        if self._undo is not None and reminder_id not in self._undo:
+            # Records are immutable, so keeping the old one is enough
+            self._undo[reminder_id] = self._cache.get(reminder_id)
+
+    def _rollback(self):
+        """Put back every reminder a failed batch touched"""
+        for reminder_id, record in self._undo.items():
+            if record is None:
+                self._cache.pop(reminder_id, None)
+                self._due_index.remove(reminder_id)
+                self._created_index.remove(reminder_id)
+                continue
+            self._cache[reminder_id] = record
+            self._reindex(record)
+        # Doses are already in the journal, so they stay recorded
+        for event in self._batch_doses:
+            record = self._cache.get(event['reminder_id'])
+            if record is not None:
+                self._cache[record.id] = record = with_dose_event(record, event)
+                self._reindex(record)
+
+    def _acknowledge_writes(self):
+        watcher = FileWatcher()
+        for path in getattr(self, '_watched_paths', ()):
+            watcher.acknowledge(path)
+
+    def _on_file_changed(self, path):
+        """FileWatcher callback: another process changed our files"""
+        self.refresh_from_disk()
+
+    def refresh_from_disk(self):
+        """Re-read the store and journal, update the cache and notify changed ids only.
+
+        Returns the number of reminders that were added, updated or deleted.
+        """
+        with self._lock:
+            # No compaction may move events between the journal and the rows mid-read
+            with self._compaction_lock, file_lock(self.journal.compacting_path, shared=True):
+                rows = self.store.get_reminders()
+                pending = list(self.journal.read(self.journal.compacting_path))
+                pending.extend(self.journal.read(self.journal.path))
+            rows = {row['id']: row for row in rows}
+            for event in pending:
+                if event['reminder_id'] in rows:
+                    apply_dose_event(rows[event['reminder_id']], event)
+            fresh = {reminder_id: ReminderRecord.from_dict(row) for reminder_id, row in rows.items()}
+
+            changes = []
+            for reminder_id in list(self._cache):
+                if reminder_id not in fresh:
+                    self._remember(reminder_id)
+                    del self._cache[reminder_id]
+                    self._due_index.remove(reminder_id)
+                    self._created_index.remove(reminder_id)
+                    changes.append(('deleted', reminder_id))
+            for reminder_id, record in fresh.items():
+                cached = self._cache.get(reminder_id)
+                if cached == record:
+                    continue
+                self._remember(reminder_id)
+                self._cache[reminder_id] = record
+                self._reindex(record)
+                changes.append(('added' if cached is None else 'updated', reminder_id))
+            for action, reminder_id in changes:
+                self._notify(action, reminder_id)
+            return len(changes)
+
+    def _reindex(self, record):
+        """Move one record in both indexes after its times may have changed"""
+        self._due_index.update(record.id, record.next_time_dt)
+        self._created_index.update(record.id, record.created_at_dt)
+
+    def subscribe(self, callback):
+        """Call callback(action, reminder_id) after every change"""
+        if callback not in self._subscribers:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def _notify(self, action, reminder_id):
+        if self._batched is not None:
+            self._batched.append((action, reminder_id))
+            return
+        for callback in list(self._subscribers):
+            try:
+                callback(action, reminder_id)
+            except Exception as e:
+                print(f"Error in reminder subscriber: {e}")
+
+    def get_reminders(self):
+        """Return copies of all reminders, latest next dose first and unscheduled last"""
+        return [record.to_dict() for record in self.get_records()]
+
+    def get_records(self):
+        """Return the cached ReminderRecords, latest next dose first and unscheduled last.
+        
+        Records are shared, not copied: they are immutable, and every change
+        made through this repository caches a new record, so a list returned
+        here keeps showing the state it was read in.
+        """
+        # The file watcher thread may be refreshing the cache and indexes
+        with self._lock:
+            cache, due_index = self._cache, self._due_index
+            scheduled = [cache[reminder_id] for reminder_id in due_index.ids(reverse=True)]
+            unscheduled = [r for r in cache.values() if r.id not in due_index]
+            return scheduled + unscheduled
+
+    def get_record(self, reminder_id):
+        """Return the cached ReminderRecord for an id, or None"""
+        return self._cache.get(reminder_id)
+
+    def get_snapshot(self):
+        """Return a ReminderSnapshot of the current records (shared, since records are immutable)"""
+        return ReminderSnapshot(self.get_records())
+
+    def get_reminder(self, reminder_id):
+        """Return a copy of one reminder, or None"""
+        record = self._cache.get(reminder_id)
+        return record.to_dict() if record is not None else None
+
+    def get_active_records(self):
+        """Return active ReminderRecords, most recently created first"""
+        with self._lock:
+            cache, created_index = self._cache, self._created_index
+            records = [cache[reminder_id] for reminder_id in created_index.ids(reverse=True)]
+            records.extend(r for r in cache.values() if r.id not in created_index)
+        return [r for r in records if r.is_active]
+
+    def get_next_due(self, k=1, after=None):
+        """Return the records of the k next doses due at or after a datetime (default now)"""
+        after = after or datetime.now()
+        with self._lock:
+            return [self._cache[reminder_id] for reminder_id in self._due_index.first(k, after)]
+
+    def get_due_between(self, start, end):
+        """Return the records with a next dose in [start, end), earliest first.
+        
+        start may be None to include every overdue dose before end.
+        """
+        with self._lock:
+            return [self._cache[reminder_id] for reminder_id in self._due_index.between(start, end)]
+
+    def get_timeline(self):
+        """Return the DoseTimeline of every remaining dose, re-expanding only
+        the reminders whose schedule changed since the last call"""
+        with self._lock:
+            self._timeline.sync(self._cache.values())
+            return self._timeline
+
+    def get_doses_between(self, start, end):
+        """Return (record, dose time) for every scheduled dose in [start, end), earliest first"""
+        with self._lock:
+            return self._with_records(self.get_timeline().doses_between(start, end))
+
+    def get_doses_due_today(self, now=None):
+        """Return (record, dose time) for every dose left today, earliest first"""
+        with self._lock:
+            return self._with_records(self.get_timeline().due_today(now))
+
+    def get_missed_doses(self, since, now=None):
+        """Return (record, dose time) for every dose scheduled between since and now"""
+        with self._lock:
+            return self._with_records(self.get_timeline().missed_since(since, now))
+
+    def _with_records(self, doses):
+        return [(self._cache[reminder_id], time) for reminder_id, time in doses]
+
+    def get_active_reminders(self):
+        """Return copies of active reminders, most recently created first"""
+        return [record.to_dict() for record in self.get_active_records()]
+
+    def add_reminder(self, reminder):
+        """Insert a new reminder dict (must contain an 'id')"""
+        with self._writing():
+            reminder = dict(reminder, schema_version=RECORD_SCHEMA_VERSION)
+            self.store.add_reminder(reminder)
+            self._remember(reminder['id'])
+            record = ReminderRecord.from_dict(self.store.normalize(reminder))
+            self._cache[record.id] = record
+            self._reindex(record)
+            self._notify('added', reminder['id'])
+            return reminder['id']
+
+    def update_reminder(self, reminder_id, **fields):
+        """Update some fields of one reminder"""
+        with self._writing():
+            record = self._cache.get(reminder_id)
+            if record is None:
+                return False
+            if record.migrated:
+                # Write the lazily migrated values (schema_version included) along
+                # with this change; dose columns are left alone since the journal
+                # may still hold events, and version is the store's to bump
+                migrated = record.to_dict()
+                for column in ('id', 'version') + DOSE_COLUMNS:
+                    migrated.pop(column)
+                fields = dict(migrated, **fields)
+            # Optimistic write against the version we last read; edits another
+            # process made to other fields are merged by the store
+            base = {key: record.get(key) for key in fields}
+            try:
+                version = self.store.update_reminder(reminder_id, base=base, version=record.version, **fields)
+            except UpdateConflict as e:
+                print(f"Error updating reminder: {e}")
+                # Show what the other process saved instead
+                self.refresh_from_disk()
+                return False
+            if version is None:
+                return False
+            merged = version != record.version + 1
+            self._remember(reminder_id)
+            # Patch the cache rather than re-reading the row, which may not
+            # include dose events still waiting in the journal
+            changes = {
+                key: bool(value) if key == 'is_active' else value
+                for key, value in fields.items() if key in REMINDER_COLUMNS and key != 'id'
+            }
+            changes['version'] = version
+            self._cache[reminder_id] = record = record.replace(migrated=False, **changes)
+            self._reindex(record)
+            self._notify('updated', reminder_id)
+            if merged:
+                # Another process edited other fields first; pick those up too
+                self.refresh_from_disk()
+            return True
+
+    def delete_reminder(self, reminder_id):
+        """Delete one reminder by id"""
+        with self._writing():
+            self._remember(reminder_id)
+            if self._cache.pop(reminder_id, None) is None:
+                return False
+            self._due_index.remove(reminder_id)
+            self._created_index.remove(reminder_id)
+            self.store.delete_reminder(reminder_id)
+            self._notify('deleted', reminder_id)
+            return True
+
+    def record_dose(self, reminder_id, event, next_time=None):
+        """Record a taken/skipped/snoozed dose with one journal append"""
+        with self._writing():
+            reminder = self._cache.get(reminder_id)
+            if reminder is None:
+                return None
+            self._remember(reminder_id)
+            record = self.journal.append(reminder_id, event, next_time=next_time)
+            if self._batch_doses is not None:
+                self._batch_doses.append(record)
+            self._cache[reminder_id] = reminder = with_dose_event(reminder, record)
+            self._reindex(reminder)
+            self._notify('updated', reminder_id)
+            if self.journal.pending_count >= COMPACT_THRESHOLD:
+                self.compact_in_background()
+            return record
+
+    def record_doses(self, entries):
+        """Record many (reminder_id, event, next_time, time) dose events with one
+        journal write; each changed reminder is notified once.
+
+        Entries for reminders that no longer exist are dropped. Returns the
+        DoseEvents recorded.
+        """
+        with self._writing():
+            entries = [entry for entry in entries if entry[0] in self._cache]
+            events = self.journal.append_many(entries)
+            if self._batch_doses is not None:
+                self._batch_doses.extend(events)
+            # Fold each reminder's events into one change, then build one new record
+            changes = {}
+            for event in events:
+                reminder_id = event['reminder_id']
+                if reminder_id not in changes:
+                    changes[reminder_id] = dose_counts(self._cache[reminder_id])
+                apply_dose_event(changes[reminder_id], event)
+            for reminder_id, change in changes.items():
+                self._remember(reminder_id)
+                self._cache[reminder_id] = record = self._cache[reminder_id].replace(**change)
+                self._reindex(record)
+                self._notify('updated', reminder_id)
+            if self.journal.pending_count >= COMPACT_THRESHOLD:
+                self.compact_in_background()
+            return events
+
+    def reconcile_missed_doses(self, now=None):
+        """Record every dose window that closed untaken as a 'missed' event.
+
+        Meant to run when the app starts or resumes: all active reminders are
+        checked in one sweep (see find_missed_doses), the misses are
+        journaled in one write and each reminder's next_time moves on to the
+        dose still open now. Missed doses use up the course, so a course
+        abandoned long enough ends up completed (and is archived like any
+        other). Running it again finds nothing new.
+
+        Returns (record, missed count) per reminder, records as updated.
+        """
+        now = now or datetime.now()
+        with self._writing():
+            found = find_missed_doses(list(self._cache.values()), now)
+            entries = [
+                (record.id, 'missed', next_time, time)
+                for record, missed, next_times in found
+                for time, next_time in zip(missed, next_times)
+            ]
+            self.record_doses(entries)
+            return [(self._cache[record.id], len(missed)) for record, missed, _ in found]
+
+    def get_dose_history(self, reminder_id):
+        """Return every dose event of a reminder, compacted and pending, oldest first"""
+        events = self.store.get_dose_events(reminder_id)
+        seen = {event['id'] for event in events}
+        for path in (self.journal.compacting_path, self.journal.path):
+            for event in self.journal.read(path):
+                if event['reminder_id'] == reminder_id and event['id'] not in seen:
+                    events.append(event)
+        return [DoseEvent(event) for event in events]
+
+    def get_adherence(self, reminder_id=None):
+        """Return the AdherenceStats of one reminder, or of the whole user by default.
+
+        The summaries are kept up to date as the journal is compacted, so
+        this folds in the few pending events and reads one row.
+        """
+        self.compact()
+        return self.store.get_adherence(reminder_id or USER_SCOPE)
+
+    def get_all_adherence(self):
+        """Return {reminder_id: AdherenceStats}, the user's totals under USER_SCOPE"""
+        self.compact()
+        return self.store.get_all_adherence()
+
+    def archive_completed(self, older_than=ARCHIVE_AFTER):
+        """Move courses completed more than older_than ago into the archive"""
+        with self._writing():
+            cutoff = datetime.now() - older_than
+            completed = [
+                r for r in self._cache.values()
+                if r.is_completed and (r.last_taken_dt is None or r.last_taken_dt < cutoff)
+            ]
+            if not completed:
+                return 0
+            # Fold in pending doses so the archived history is complete
+            self.compact()
+            courses = [(r.to_dict(), self.store.get_dose_events(r.id)) for r in completed]
+            try:
+                archived = self.archive.archive(courses)
+            except Exception as e:
+                print(f"Error archiving completed reminders: {e}")
+                return 0
+            self.store.delete_reminders(archived)
+            for reminder_id in archived:
+                self._remember(reminder_id)
+                self._cache.pop(reminder_id, None)
+                self._due_index.remove(reminder_id)
+                self._created_index.remove(reminder_id)
+                self._notify('deleted', reminder_id)
+            print(f"Archived {len(archived)} completed reminders")
+            return len(archived)
+
+    def get_archive_summaries(self):
+        """Return summaries of archived courses without opening the archive files"""
+        return self.archive.summaries()
+
+    def get_archived_course(self, reminder_id):
+        """Return one archived course with its dose history, read on demand"""
+        return self.archive.get_course(reminder_id)
+
+    def compact(self):
+        """Fold journaled dose events into SQLite and truncate the journal"""
+        # The file lock keeps other processes sharing the journal from
+        # rotating or removing the file this one is still folding in
+        with self._compaction_lock, file_lock(self.journal.compacting_path):
+            compacted = 0
+            # A leftover rotated file is handled first, then the live journal
+            for _ in range(2):
+                path = self.journal.rotate()
+                if path is None:
+                    break
+                events = list(self.journal.read(path))
+                self.store.apply_dose_events(events)
+                self.journal.finish_rotation()
+                compacted += len(events)
+            self._acknowledge_writes()
+            return compacted
+
+    def compact_in_background(self):
+        """Start a compaction on a worker thread unless one is already running"""
+        if self._compaction_thread is not None and self._compaction_thread.is_alive():
+            return
+        self._compaction_thread = threading.Thread(target=self.compact, daemon=True)
+        self._compaction_thread.start()
@@ -0,0 +1,489 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+import codec
+from adherence import AdherenceStats, AdherenceUpdate, USER_SCOPE
+from dose_journal import apply_dose_event
+from records import DoseEvent
+
+# Columns stored for every reminder, in table order
+REMINDER_COLUMNS = (
+    'id',
+    'medication_name',
+    'dosage',
+    'frequency',
+    'duration',
+    'notes',
+    'doses_taken',
+    'next_time',
+    'created_at',
+    'last_taken',
+    'is_active',
+    'schema_version',
+    'version',
+    'doses_missed'
+)
+
+# Columns only ever changed by replaying dose events; the journal orders
+# those, so edits never conflict on them
+DOSE_COLUMNS = ('doses_taken', 'next_time', 'last_taken', 'doses_missed')
+
+# How often update_reminder re-reads and merges after losing a race
+UPDATE_RETRIES = 5
+
+# Columns stored for every compacted dose event
+DOSE_EVENT_COLUMNS = DoseEvent.FIELDS
+
+# Bump this when the table layout changes (stored in PRAGMA user_version)
+SCHEMA_VERSION = 7
+
+class UpdateConflict(Exception):
+    """Another process changed the same fields of a reminder to other values"""
+
+    def __init__(self, reminder_id, fields):
+        super(UpdateConflict, self).__init__(
+            f"Reminder {reminder_id} was changed elsewhere: {', '.join(fields)}"
+        )
+        self.reminder_id = reminder_id
+        self.fields = fields
+
+class ReminderSnapshot:
+    """
+    All reminders loaded by one query, in display order, with an id index.
+    Built once per refresh of the Reminder screen and shared by every card,
+    so building N cards reads storage once instead of N + 1 times.
+    """
+
+    def __init__(self, reminders):
+        self.reminders = reminders
+        self.by_id = {r['id']: r for r in reminders}
+
+    def get(self, reminder_id):
+        """Return the record for an id, or None"""
+        return self.by_id.get(reminder_id)
+
+    def __iter__(self):
+        return iter(self.reminders)
+
+    def __len__(self):
+        return len(self.reminders)
+
+class ReminderStore:
+    """
+    SQLite-backed storage for medication reminders.
+    Implemented as a singleton so every screen and card shares one connection.
+    Each reminder is one row keyed by its id, so taking a dose or editing a
+    reminder is a single indexed row update instead of a full file rewrite.
+    """
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __new__(cls, db_file='reminders.db', legacy_file='reminders.json',
+                legacy_medication_file='medication_reminders.json'):
+        # The store may first be opened from a background loading thread
+        with cls._instance_lock:
+            if cls._instance is None:
+                instance = super(ReminderStore, cls).__new__(cls)
+                instance.db_file = db_file
+                instance.legacy_file = legacy_file
+                instance.legacy_medication_file = legacy_medication_file
+                instance.conn = None
+                # The shared connection is used from more than one thread
+                instance.lock = threading.RLock()
+                instance._batch_depth = 0
+                instance.open()
+                cls._instance = instance
+        return cls._instance
+
+    @classmethod
+    def close_instance(cls):
+        """Close the shared store so the next ReminderStore() opens a new file"""
+        with cls._instance_lock:
+            instance, cls._instance = cls._instance, None
+        if instance is not None:
+            with instance.lock:
+                instance.close()
+
+    def open(self):
+        """Open the database, creating the schema and migrating the legacy JSON files once"""
+        if self.conn is not None:
+            return
+        self.conn = self._connect()
+
+        version = self.conn.execute('PRAGMA user_version').fetchone()[0]
+        if version < 1:
+            with self.conn:
+                self.conn.execute(
+                    """CREATE TABLE IF NOT EXISTS reminders (
+                        id TEXT PRIMARY KEY,
+                        medication_name TEXT NOT NULL DEFAULT '',
+                        dosage TEXT NOT NULL DEFAULT '',
+                        frequency TEXT NOT NULL DEFAULT 'Once daily',
+                        duration INTEGER NOT NULL DEFAULT 1,
+                        notes TEXT NOT NULL DEFAULT '',
+                        doses_taken INTEGER NOT NULL DEFAULT 0,
+                        next_time TEXT
+                    )"""
+                )
+                self.conn.execute(
+                    'CREATE INDEX IF NOT EXISTS idx_reminders_next_time ON reminders (next_time)'
+                )
+                self.conn.execute('PRAGMA user_version = 1')
+        if version < 2:
+            # Version 2 merges the MedicationReminder schema into the same table
+            with self.conn:
+                self.conn.execute('ALTER TABLE reminders ADD COLUMN created_at TEXT')
+                self.conn.execute('ALTER TABLE reminders ADD COLUMN last_taken TEXT')
+                self.conn.execute('ALTER TABLE reminders ADD COLUMN is_active INTEGER NOT NULL DEFAULT 1')
+                self.conn.execute('PRAGMA user_version = 2')
+        if version < 3:
+            # Version 3 keeps the compacted dose journal as adherence history
+            with self.conn:
+                self.conn.execute(
+                    """CREATE TABLE IF NOT EXISTS dose_events (
+                        id TEXT PRIMARY KEY,
+                        reminder_id TEXT NOT NULL,
+                        event TEXT NOT NULL,
+                        time TEXT NOT NULL,
+                        next_time TEXT
+                    )"""
+                )
+                self.conn.execute(
+                    'CREATE INDEX IF NOT EXISTS idx_dose_events_reminder ON dose_events (reminder_id, time)'
+                )
+                self.conn.execute('PRAGMA user_version = 3')
+        if version < 4:
+            # Version 4 tags each row with its record schema version (see reminder_record.py)
+            with self.conn:
+                self.conn.execute('ALTER TABLE reminders ADD COLUMN schema_version INTEGER NOT NULL DEFAULT 0')
+                self.conn.execute('PRAGMA user_version = 4')
+        if version < 5:
+            # Version 5 counts edits per row for optimistic concurrency between processes
+            with self.conn:
+                self.conn.execute('ALTER TABLE reminders ADD COLUMN version INTEGER NOT NULL DEFAULT 0')
+                self.conn.execute('PRAGMA user_version = 5')
+        if version < 6:
+            # Version 6 keeps adherence summary rows, built once from the existing history
+            with self.conn:
+                self.conn.execute(
+                    """CREATE TABLE IF NOT EXISTS adherence (
+                        scope TEXT PRIMARY KEY,
+                        taken INTEGER NOT NULL DEFAULT 0,
+                        on_time INTEGER NOT NULL DEFAULT 0,
+                        skipped INTEGER NOT NULL DEFAULT 0,
+                        missed INTEGER NOT NULL DEFAULT 0,
+                        delay_seconds INTEGER NOT NULL DEFAULT 0,
+                        current_streak INTEGER NOT NULL DEFAULT 0,
+                        longest_streak INTEGER NOT NULL DEFAULT 0,
+                        missed_by_hour TEXT NOT NULL,
+                        last_event TEXT
+                    )"""
+                )
+                self._backfill_adherence()
+                self.conn.execute('PRAGMA user_version = 6')
+        if version < 7:
+            # Version 7 counts missed doses, which use up a course like taken ones
+            with self.conn:
+                self.conn.execute('ALTER TABLE reminders ADD COLUMN doses_missed INTEGER NOT NULL DEFAULT 0')
+                self.conn.execute(
+                    "UPDATE reminders SET doses_missed = (SELECT COUNT(*) FROM dose_events "
+                    "WHERE dose_events.reminder_id = reminders.id AND event = 'missed')"
+                )
+                self.conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+        if version < 2:
+            # The legacy JSON files are imported once the table has every column
+            with self.conn:
+                if version < 1:
+                    self._import_legacy_file()
+                self._import_legacy_medication_file()
+
+    @contextmanager
+    def batch(self):
+        """Group writes into one transaction: committed when the outermost
+        block exits, rolled back if it raises. Holds the store lock throughout,
+        so other threads' writes wait rather than joining the transaction."""
+        with self.lock:
+            if self._batch_depth:
+                self._batch_depth += 1
+                try:
+                    yield
+                finally:
+                    self._batch_depth -= 1
+                return
+            self._batch_depth = 1
+            try:
+                with self.conn:
+                    yield
+            finally:
+                self._batch_depth = 0
+
+    @contextmanager
+    def _write(self):
+        """Commit a write on its own, or leave it to the enclosing batch()"""
+        if self._batch_depth:
+            yield
+        else:
+            with self.conn:
+                yield
+
+    def _connect(self):
+        """Open a configured connection to the database file"""
+        conn = sqlite3.connect(self.db_file, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        # WAL keeps readers unblocked while a row is being written
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def close(self):
+        """Close the database connection"""
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    def _backfill_adherence(self):
+        """Fold the compacted dose history into the adherence rows, in recorded order"""
+        update = AdherenceUpdate(self.conn)
+        # Each event's next_time is when the reminder's following dose was due
+        scheduled = {}
+        for event in self.conn.execute('SELECT * FROM dose_events ORDER BY rowid'):
+            update.add(event, scheduled.get(event['reminder_id']))
+            scheduled[event['reminder_id']] = event['next_time']
+        update.save()
+
+    def _import_legacy_file(self):
+        """Copy reminders from the old reminders.json list into the table"""
+        if not os.path.exists(self.legacy_file):
+            return
+        try:
+            reminders = codec.load_file(self.legacy_file)
+        except Exception as e:
+            print(f"Error reading {self.legacy_file} for migration: {e}")
+            return
+        rows = [self._to_row(r) for r in reminders if r.get('id')]
+        self.conn.executemany(
+            f"INSERT OR REPLACE INTO reminders ({', '.join(REMINDER_COLUMNS)}) "
+            f"VALUES ({', '.join('?' * len(REMINDER_COLUMNS))})",
+            rows
+        )
+        print(f"Migrated {len(rows)} reminders from {self.legacy_file}")
+
+    def _import_legacy_medication_file(self):
+        """Copy reminders from medication_reminders.json (a dict keyed by id) into the table"""
+        if not os.path.exists(self.legacy_medication_file):
+            return
+        try:
+            reminders = codec.load_file(self.legacy_medication_file)
+        except Exception as e:
+            print(f"Error reading {self.legacy_medication_file} for migration: {e}")
+            return
+        rows = [
+            self._to_row(dict(reminder, id=reminder_id))
+            for reminder_id, reminder in reminders.items()
+        ]
+        # Reminders already imported from reminders.json win on id clashes
+        self.conn.executemany(
+            f"INSERT OR IGNORE INTO reminders ({', '.join(REMINDER_COLUMNS)}) "
+            f"VALUES ({', '.join('?' * len(REMINDER_COLUMNS))})",
+            rows
+        )
+        print(f"Migrated {len(rows)} reminders from {self.legacy_medication_file}")
+
+    def _to_row(self, reminder):
+        """Convert a reminder dict into a tuple of column values"""
+        return (
+            reminder['id'],
+            reminder.get('medication_name', ''),
+            reminder.get('dosage', ''),
+            reminder.get('frequency', 'Once daily'),
+            int(reminder.get('duration') or 1),
+            reminder.get('notes', '') or '',
+            int(reminder.get('doses_taken') or 0),
+            reminder.get('next_time'),
+            reminder.get('created_at'),
+            reminder.get('last_taken'),
+            1 if reminder.get('is_active', True) else 0,
+            int(reminder.get('schema_version') or 0),
+            int(reminder.get('version') or 0),
+            int(reminder.get('doses_missed') or 0)
+        )
+
+    def normalize(self, reminder):
+        """Return the reminder dict exactly as it would be read back from the table"""
+        normalized = dict(zip(REMINDER_COLUMNS, self._to_row(reminder)))
+        normalized['is_active'] = bool(normalized['is_active'])
+        return normalized
+
+    def _from_row(self, row):
+        """Convert a table row into a reminder dict"""
+        reminder = dict(row)
+        reminder['is_active'] = bool(reminder['is_active'])
+        return reminder
+
+    def get_reminders(self):
+        """Return all reminders as dicts, latest next dose first and unscheduled last"""
+        with self.lock:
+            cursor = self.conn.execute(
+                'SELECT * FROM reminders ORDER BY next_time IS NULL, next_time DESC'
+            )
+            return [self._from_row(row) for row in cursor]
+
+    def get_snapshot(self):
+        """Return a ReminderSnapshot of every reminder in display order"""
+        return ReminderSnapshot(self.get_reminders())
+
+    def get_reminder(self, reminder_id):
+        """Return a single reminder dict by id, or None"""
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT * FROM reminders WHERE id = ?', (reminder_id,)
+            ).fetchone()
+            return self._from_row(row) if row else None
+
+    def add_reminder(self, reminder):
+        """Insert a new reminder dict (must contain an 'id')"""
+        with self.lock:
+            with self._write():
+                self.conn.execute(
+                    f"INSERT INTO reminders ({', '.join(REMINDER_COLUMNS)}) "
+                    f"VALUES ({', '.join('?' * len(REMINDER_COLUMNS))})",
+                    self._to_row(reminder)
+                )
+            return reminder['id']
+
+    def update_reminder(self, reminder_id, base=None, version=None, **fields):
+        """Update only the given columns of one reminder; returns the row's new version.
+
+        With version (the row version the caller last read) the write only
+        succeeds if nobody else edited the row since. When somebody did, the
+        row is re-read and the change retried as long as the other edit
+        touched different fields, or set them to the same values, judged
+        against base (the caller's last known values). A real conflict raises
+        UpdateConflict. Returns None if the reminder no longer exists.
+        """
+        fields = {k: v for k, v in fields.items() if k in REMINDER_COLUMNS and k not in ('id', 'version')}
+        if 'is_active' in fields:
+            fields['is_active'] = 1 if fields['is_active'] else 0
+        if not fields:
+            return None
+        assignments = ', '.join(f'{column} = ?' for column in fields)
+        base = base or {}
+        with self.lock:
+            for _ in range(UPDATE_RETRIES):
+                with self._write():
+                    if version is None:
+                        cursor = self.conn.execute(
+                            f'UPDATE reminders SET {assignments}, version = version + 1 WHERE id = ?',
+                            (*fields.values(), reminder_id)
+                        )
+                    else:
+                        cursor = self.conn.execute(
+                            f'UPDATE reminders SET {assignments}, version = version + 1 '
+                            f'WHERE id = ? AND version = ?',
+                            (*fields.values(), reminder_id, version)
+                        )
+                    if cursor.rowcount > 0:
+                        row = self.conn.execute(
+                            'SELECT version FROM reminders WHERE id = ?', (reminder_id,)
+                        ).fetchone()
+                        return row['version']
+                row = self.conn.execute('SELECT * FROM reminders WHERE id = ?', (reminder_id,)).fetchone()
+                if row is None:
+                    return None
+                current = self._from_row(row)
+                conflicts = [
+                    column for column, value in fields.items()
+                    if column not in DOSE_COLUMNS and column in base
+                    and current[column] != self._stored_value(column, base[column])
+                    and current[column] != self._stored_value(column, value)
+                ]
+                if conflicts:
+                    raise UpdateConflict(reminder_id, conflicts)
+                # Someone else edited other fields; write ours on top of their version
+                version = current['version']
+            raise UpdateConflict(reminder_id, list(fields))
+
+    def _stored_value(self, column, value):
+        """A value as _from_row would return it, for comparing with rows"""
+        if column == 'is_active':
+            return bool(value)
+        if column in ('duration', 'doses_taken', 'doses_missed'):
+            try:
+                return int(value)
+            except (TypeError, ValueError):
+                return value
+        return value
+
+    def delete_reminder(self, reminder_id):
+        """Delete one reminder by id"""
+        with self.lock:
+            with self._write():
+                cursor = self.conn.execute('DELETE FROM reminders WHERE id = ?', (reminder_id,))
+            return cursor.rowcount > 0
+
+    def delete_reminders(self, reminder_ids):
+        """Delete several reminders and their dose history in one transaction"""
+        rows = [(reminder_id,) for reminder_id in reminder_ids]
+        with self.lock:
+            with self._write():
+                self.conn.executemany('DELETE FROM dose_events WHERE reminder_id = ?', rows)
+                self.conn.executemany('DELETE FROM reminders WHERE id = ?', rows)
+
+    def apply_dose_events(self, events):
+        """Fold journal events into the reminder rows and the dose history.
+
+        Runs on its own connection so the dose journal can be compacted from a
+        background thread. Events already in dose_events are skipped, which
+        makes re-running an interrupted compaction safe. The adherence rows
+        are updated in the same transaction, so each event counts once.
+        """
+        conn = self._connect()
+        try:
+            with conn:
+                adherence = AdherenceUpdate(conn)
+                for event in events:
+                    cursor = conn.execute(
+                        f"INSERT OR IGNORE INTO dose_events ({', '.join(DOSE_EVENT_COLUMNS)}) "
+                        f"VALUES ({', '.join('?' * len(DOSE_EVENT_COLUMNS))})",
+                        tuple(event.get(column) for column in DOSE_EVENT_COLUMNS)
+                    )
+                    if cursor.rowcount == 0:
+                        continue
+                    row = conn.execute(
+                        f"SELECT {', '.join(DOSE_COLUMNS)} FROM reminders WHERE id = ?",
+                        (event['reminder_id'],)
+                    ).fetchone()
+                    # The dose was due at the reminder's next_time before this event
+                    adherence.add(event, row['next_time'] if row is not None else None)
+                    if row is None:
+                        # Reminder was deleted; keep the event as history only
+                        continue
+                    reminder = apply_dose_event(dict(row), event)
+                    conn.execute(
+                        f"UPDATE reminders SET {', '.join(f'{column} = ?' for column in DOSE_COLUMNS)} WHERE id = ?",
+                        (*(reminder[column] for column in DOSE_COLUMNS), event['reminder_id'])
+                    )
+                adherence.save()
+        finally:
+            conn.close()
+
+    def get_dose_events(self, reminder_id):
+        """Return the compacted dose history of one reminder, oldest first"""
+        with self.lock:
+            cursor = self.conn.execute(
+                'SELECT * FROM dose_events WHERE reminder_id = ? ORDER BY time', (reminder_id,)
+            )
+            return [dict(row) for row in cursor]
+
+    def get_adherence(self, scope=USER_SCOPE):
+        """Return the AdherenceStats of a reminder id (default: the whole user)"""
+        with self.lock:
+            row = self.conn.execute('SELECT * FROM adherence WHERE scope = ?', (scope,)).fetchone()
+        return AdherenceStats.from_row(row) if row else AdherenceStats(scope)
+
+    def get_all_adherence(self):
+        """Return {scope: AdherenceStats} for every summary row, the user's under USER_SCOPE"""
+        with self.lock:
+            rows = self.conn.execute('SELECT * FROM adherence').fetchall()
+        return {row['scope']: AdherenceStats.from_row(row) for row in rows}
@@ -204,6 +204,6 @@ class SettingsScreen(BaseScreen):
     def logout(self, instance):
         """Log out and return to login screen"""
         app = App.get_running_app()
-        app.current_user = None
+        app.on_logout()
         self.manager.transition = SlideTransition(direction='right')
         self.manager.current = 'login'
\ No newline at end of file
@@ -0,0 +1,92 @@
+"""
+Regression test: reading the repository while another process changes the store.
+
+refresh_from_disk runs on the FileWatcher thread and changes the cache and
+indexes in place; readers on other threads must never see them half-updated.
+
+Usage: python -m pytest test_reminder_repository.py (or python test_reminder_repository.py)
+"""
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import unittest
+import uuid
+from datetime import datetime, timedelta
+
+from reminder_repository import ReminderRepository
+from reminder_store import ReminderStore, REMINDER_COLUMNS
+
+REMINDERS = 200
+REFRESHES = 30
+
+def make_reminder(i, now):
+    return {
+        'id': str(uuid.uuid4()),
+        'medication_name': f'Medication {i}',
+        'frequency': 'Twice daily',
+        'duration': 7,
+        'next_time': (now + timedelta(minutes=i - REMINDERS // 2)).isoformat(),
+        'created_at': (now - timedelta(minutes=i)).isoformat(),
+        'is_active': True
+    }
+
+class ConcurrentReadTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.workdir = tempfile.mkdtemp(prefix='test_repository_')
+        os.chdir(self.workdir)
+        self.repository = ReminderRepository()
+
+    def tearDown(self):
+        ReminderRepository.close_instance()
+        os.chdir(self.cwd)
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+    def test_reads_during_external_changes(self):
+        now = datetime.now()
+        with self.repository.batch():
+            for i in range(REMINDERS):
+                self.repository.add_reminder(make_reminder(i, now))
+
+        errors = []
+        done = threading.Event()
+
+        def read():
+            repository = self.repository
+            while not done.is_set():
+                try:
+                    repository.get_records()
+                    repository.get_active_records()
+                    repository.get_next_due(5, now)
+                    repository.get_due_between(None, now + timedelta(hours=1))
+                except Exception as e:
+                    errors.append(e)
+
+        reader = threading.Thread(target=read)
+        reader.start()
+        # Another process deleting and adding rows behind the repository's back
+        other = sqlite3.connect(self.repository.store.db_file)
+        store = ReminderStore()
+        try:
+            for i in range(REFRESHES):
+                with other:
+                    ids = [row[0] for row in other.execute('SELECT id FROM reminders LIMIT 20')]
+                    other.executemany('DELETE FROM reminders WHERE id = ?', [(reminder_id,) for reminder_id in ids])
+                    other.executemany(
+                        f"INSERT INTO reminders ({', '.join(REMINDER_COLUMNS)}) "
+                        f"VALUES ({', '.join('?' * len(REMINDER_COLUMNS))})",
+                        [store._to_row(make_reminder(REMINDERS + i * 20 + j, now)) for j in range(20)]
+                    )
+                self.repository.refresh_from_disk()
+        finally:
+            done.set()
+            reader.join()
+            other.close()
+        self.assertEqual(errors, [])
+        self.assertEqual(len(self.repository.get_records()), REMINDERS)
+
+if __name__ == '__main__':
+    unittest.main()
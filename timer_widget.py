@@ -8,12 +8,31 @@ from kivy.metrics import dp
 from kivy.properties import NumericProperty, StringProperty, BooleanProperty, ObjectProperty
 from kivy.graphics import Color, RoundedRectangle
 from kivy.core.window import Window
+from kivy.app import App
 from datetime import datetime, timedelta
 import time
 from plyer import notification
+from frequency import parse_frequency
+
+def deadline_clock():
+    """Seconds on a clock that never jumps with wall-clock changes and, where
+    the OS offers it (Linux/Android), keeps counting while the device sleeps"""
+    if hasattr(time, 'CLOCK_BOOTTIME'):
+        return time.clock_gettime(time.CLOCK_BOOTTIME)
+    return time.monotonic()
 
 class TimerWidget(BoxLayout):
-    """Widget that displays a countdown timer for medication reminders"""
+    """Widget that displays a countdown timer for medication reminders.
+    
+    The countdown is an absolute deadline on deadline_clock(); every redraw
+    computes the remaining time from it, so late frames or time spent in the
+    background never make it drift. Instead of a fixed 1 s interval the timer
+    schedules one wake-up at the next moment the label changes: each minute
+    while a minute or more remains (the label then shows no seconds), each
+    second in the last minute. While it is not in the window it skips the
+    redraws and wakes only at the deadline itself, catching up when it is
+    shown again or the app resumes.
+    """
     
     time_remaining = NumericProperty(0)  # In seconds
     medication_name = StringProperty('')
@@ -36,14 +55,18 @@ class TimerWidget(BoxLayout):
         self.medication_name = reminder_data.get('medication_name', 'Medication')
         self.dosage = reminder_data.get('dosage', '')
         
-        # Calculate time until next dose
+        # Calculate time until next dose; the bar spans the whole dose interval
+        interval = parse_frequency(reminder_data.get('frequency')).interval
         next_time = reminder_data.get('next_time')
+        self.deadline = deadline_clock()
+        self._tick_event = None
         if next_time and isinstance(next_time, datetime):
             now = datetime.now()
             if next_time > now:
                 time_diff = next_time - now
+                self.deadline += time_diff.total_seconds()
                 self.time_remaining = time_diff.total_seconds()
-                self.max_time = self.time_remaining
+                self.max_time = max(self.time_remaining, interval.total_seconds())
             else:
                 self.time_remaining = 0
                 self.max_time = 0
@@ -115,6 +138,12 @@ class TimerWidget(BoxLayout):
         button_layout.add_widget(self.skip_btn)
         self.add_widget(button_layout)
         
+        # Shown again after being off screen: catch up with the deadline
+        self.bind(parent=self._on_parent)
+        app = App.get_running_app()
+        if app is not None:
+            app.bind(on_resume=self._on_app_resume)
+        
         # Start the timer if time remaining is greater than 0
         if self.time_remaining > 0:
             self.start_timer()
@@ -125,7 +154,7 @@ class TimerWidget(BoxLayout):
         self.bg_rect.size = self.size
         
     def _format_time(self, seconds):
-        """Format seconds into a readable time string"""
+        """Format seconds into a readable time string, to the minute until the last minute"""
         if seconds <= 0:
             return "Due Now!"
             
@@ -134,21 +163,57 @@ class TimerWidget(BoxLayout):
         minutes, seconds = divmod(remainder, 60)
         
         if hours > 0:
-            return f"{hours}h {minutes}m {seconds}s"
+            return f"{hours}h {minutes}m"
         elif minutes > 0:
-            return f"{minutes}m {seconds}s"
+            return f"{minutes}m"
         else:
             return f"{seconds}s"
     
+    def _next_tick_delay(self, remaining):
+        """Seconds until the label would next change"""
+        # Whole seconds in the last minute, whole minutes before that; the
+        # small margin makes sure the value has flipped when we wake
+        unit = 1 if remaining <= 60 else 60
+        return remaining % unit + 0.01 if remaining % unit else unit
+    
     def start_timer(self):
         """Start the countdown timer"""
         self.is_running = True
-        Clock.schedule_interval(self.update_timer, 1)
+        self._schedule_tick(0)
+    
+    def stop_timer(self):
+        """Stop the countdown timer"""
+        self.is_running = False
+        if self._tick_event is not None:
+            self._tick_event.cancel()
+            self._tick_event = None
+    
+    def _schedule_tick(self, delay):
+        if self._tick_event is not None:
+            self._tick_event.cancel()
+        self._tick_event = Clock.schedule_once(self.update_timer, delay)
     
-    def update_timer(self, dt):
-        """Update the timer each second"""
+    def _on_parent(self, instance, parent):
+        # Redraw now if shown, or drop to the single off-screen wake-up if hidden
+        if self.is_running:
+            self._schedule_tick(0)
+    
+    def _on_app_resume(self, *args):
+        if self.is_running:
+            self._schedule_tick(0)
+    
+    def update_timer(self, dt=None):
+        """Redraw from the deadline and schedule the next wake-up"""
+        self._tick_event = None
+        if not self.is_running:
+            return
+        self.time_remaining = max(self.deadline - deadline_clock(), 0)
         if self.time_remaining > 0:
-            self.time_remaining -= 1
+            if self.get_root_window() is None:
+                # Not on screen: no redraws, just one wake-up at the deadline
+                # so the notification still fires (or until shown again)
+                self._schedule_tick(self.time_remaining)
+                return
             self.progress.value = self.time_remaining
             self.time_label.text = self._format_time(self.time_remaining)
             
@@ -158,20 +223,19 @@ class TimerWidget(BoxLayout):
             elif self.time_remaining < 300:  # Less than 5 minutes
                 self.time_label.color = (0.9, 0.6, 0.1, 1)  # Orange
             
-            return True
+            self._schedule_tick(self._next_tick_delay(self.time_remaining))
         else:
             self.is_running = False
+            self.progress.value = 0
             self.time_label.text = "Due Now!"
             self.time_label.color = (0.9, 0.3, 0.3, 1)  # Red
+            # Due even if nobody is looking at the widget
             self.show_notification()
-            return False
     
     def take_medication_now(self, instance):
         """Handle when user takes medication now"""
         # Stop the timer
-        if self.is_running:
-            self.is_running = False
-            Clock.unschedule(self.update_timer)
+        self.stop_timer()
         
         # Show a confirmation popup
         content = BoxLayout(orientation='vertical', padding=dp(10), spacing=dp(10))
@@ -232,9 +296,7 @@ class TimerWidget(BoxLayout):
         
         def confirm_skip(btn):
             popup.dismiss()
-            if self.is_running:
-                self.is_running = False
-                Clock.unschedule(self.update_timer)
+            self.stop_timer()
             if self.on_complete:
                 self.on_complete(self.reminder_id, 'skipped')
             
@@ -0,0 +1,106 @@
+import hashlib
+import os
+import re
+import threading
+
+# Each user's reminders and dose journal live in their own directory here
+USER_DATA_DIR = 'user_data'
+
+# Reminder data files that used to be shared by every user; the first user to
+# log in after the upgrade adopts them so an existing install keeps its data
+SHARED_DATA_FILES = (
+    'reminders.db', 'reminders.db-wal', 'reminders.db-shm',
+    'dose_journal.jsonl', 'dose_journal.jsonl.compacting',
+    'reminders.json', 'medication_reminders.json'
+)
+ADOPTED_MARKER = '.shared_data_adopted'
+
+class NoUserLoggedIn(Exception):
+    """Reminder storage was opened without a user once data is stored per user"""
+
+    def __init__(self, filename):
+        super(NoUserLoggedIn, self).__init__(
+            f"Reminders are stored per user; log in before opening {filename}"
+        )
+        self.filename = filename
+
+class UserSession:
+    """
+    The logged-in user's storage namespace.
+    Implemented as a singleton so the stores resolve their file paths from
+    the same session.
+
+    login() only records the user; the reminder store and dose journal are
+    opened lazily from path() the first time the repository is used, and
+    logout() closes them, so a shared tablet only ever has the active
+    user's data open. Without a logged-in user path() falls back to the
+    working directory, where the data lived before it was partitioned,
+    but only until the first user adopts those files (shared_data_adopted()).
+    After that it raises NoUserLoggedIn rather than silently starting a new,
+    empty store there.
+    """
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __new__(cls):
+        with cls._instance_lock:
+            if cls._instance is None:
+                instance = super(UserSession, cls).__new__(cls)
+                instance.username = None
+                instance.data_dir = None
+                cls._instance = instance
+        return cls._instance
+
+    def login(self, username):
+        """Switch the storage namespace to username's directory"""
+        if username == self.username:
+            return
+        if self.username is not None:
+            self.logout()
+        data_dir = os.path.join(USER_DATA_DIR, safe_dirname(username))
+        os.makedirs(data_dir, exist_ok=True)
+        self._adopt_shared_data(data_dir)
+        self.username = username
+        self.data_dir = data_dir
+
+    def logout(self):
+        """Close the user's open stores and leave the namespace"""
+        # Imported here to avoid a cycle: the stores resolve paths through us
+        from reminder_repository import ReminderRepository
+        ReminderRepository.close_instance()
+        self.username = None
+        self.data_dir = None
+
+    def path(self, filename):
+        """Return where filename lives for the current user"""
+        if self.data_dir is None:
+            if self.shared_data_adopted():
+                raise NoUserLoggedIn(filename)
+            return filename
+        return os.path.join(self.data_dir, filename)
+
+    def shared_data_adopted(self):
+        """True once a user has taken over the reminder files of the working directory"""
+        return os.path.exists(os.path.join(USER_DATA_DIR, ADOPTED_MARKER))
+
+    def _adopt_shared_data(self, data_dir):
+        """Move pre-partitioning reminder files into the first user's directory"""
+        if self.shared_data_adopted():
+            return
+        marker = os.path.join(USER_DATA_DIR, ADOPTED_MARKER)
+        for filename in SHARED_DATA_FILES:
+            if os.path.exists(filename):
+                try:
+                    os.replace(filename, os.path.join(data_dir, filename))
+                except OSError as e:
+                    print(f"Error moving {filename} to {data_dir}: {e}")
+        with open(marker, 'w') as f:
+            f.write(data_dir)
+
+def safe_dirname(username):
+    """Turn a username into a directory name that can't escape USER_DATA_DIR"""
+    name = re.sub(r'[^\w.-]', '_', username).strip('.')
+    if name != username:
+        # Keep names that only differ in replaced characters apart
+        name = f"{name}-{hashlib.sha1(username.encode('utf-8')).hexdigest()[:8]}"
+    return name